@@ -44,11 +44,11 @@ let s:scriptdir = expand("<sfile>:h") . '/'
 let s:scriptdirpy = expand("<sfile>:h") . '/conque_term/'
 
 " global list of terminal instances
-let s:term_obj = {'idx': 1, 'var': '', 'is_buffer': 1, 'active': 1, 'buffer_name': '', 'command': ''}
+let s:term_obj = {'idx': 1, 'var': '', 'is_buffer': 1, 'active': 1, 'buffer_name': '', 'command': '', 'exited': 0, 'exit_status': ''}
 let g:ConqueTerm_Terminals = {}
 
 " global lists of registered functions
-let s:hooks = { 'after_startup': [], 'buffer_enter': [], 'buffer_leave': [], 'after_keymap': [] }
+let s:hooks = { 'after_startup': [], 'buffer_enter': [], 'buffer_leave': [], 'after_keymap': [], 'after_exit': [] }
 
 " required for session support
 if g:ConqueTerm_SessionSupport == 1
@@ -66,9 +66,15 @@ let g:ConqueTerm_TerminalsString = ''
 " init terminal counter
 let g:ConqueTerm_Idx = 0
 
-" we clobber this value later
+" we clobber this value later, unless timers are available
 let s:save_updatetime = &updatetime
 
+" poll from a timer instead of CursorHold events (Vim 7.4.1578+)
+let s:use_timers = has('timers')
+let s:tick_timer = -1
+let s:resize_timer = -1
+let s:pool_timer = -1
+
 " have we called the init() function yet?
 let s:initialized = 0
 
@@ -438,6 +444,7 @@ function! conque_term#open(...) "{{{
     let vim_startup_commands = get(a:000, 1, [])
     let return_to_current  = get(a:000, 2, 0)
     let is_buffer  = get(a:000, 3, 1)
+    let use_pipes  = get(a:000, 4, 0)
 
     " dependency check
     if !conque_term#dependency_check()
@@ -496,10 +503,29 @@ function! conque_term#open(...) "{{{
         let options = {}
         let options["TERM"] = g:ConqueTerm_TERM
         let options["CODE_PAGE"] = g:ConqueTerm_CodePage
+        let options["encoding"] = g:ConqueTerm_Encoding
+        let options["read_thread"] = g:ConqueTerm_ReadThread
+        let options["read_buffer_size"] = g:ConqueTerm_ReadBufferSize
+        let options["close_timeout"] = g:ConqueTerm_CloseTimeout
+        let options["poll_min"] = g:ConqueTerm_PollMinInterval
+        let options["poll_max"] = g:ConqueTerm_PollMaxInterval
+        let options["read_budget"] = g:ConqueTerm_ReadBudget
+        let options["echo_wait"] = g:ConqueTerm_EchoWait
+        let options["predict_echo"] = g:ConqueTerm_PredictEcho
+        let options["scrollback"] = g:ConqueTerm_Scrollback
+        let options["history"] = g:ConqueTerm_History
+        let options["memory_limit"] = g:ConqueTerm_MemoryLimit
+        let options["pool"] = index(g:ConqueTerm_PoolCommands, command) >= 0
+        let options["log_file"] = conque_term#log_file_name(g:ConqueTerm_LogFile, g:ConqueTerm_Idx)
+        let options["log_input"] = g:ConqueTerm_LogInput
+        let options["log_compress"] = g:ConqueTerm_LogCompress
         let options["color"] = g:ConqueTerm_Color
         let options["offset"] = 0 " g:ConqueTerm_StartMessages * 10
 
-        if s:platform == 'unix'
+        if s:platform == 'unix' && use_pipes
+            execute s:py . ' ' . g:ConqueTerm_Var . ' = ConquePipe()'
+            execute s:py . ' ' . g:ConqueTerm_Var . ".open()"
+        elseif s:platform == 'unix'
             execute s:py . ' ' . g:ConqueTerm_Var . ' = Conque()'
             execute s:py . ' ' . g:ConqueTerm_Var . ".open()"
         else
@@ -513,6 +539,17 @@ function! conque_term#open(...) "{{{
                 call conque_term#init_conceal_color()
             endif
         endif
+
+        " add to list of terminals checked by conque_term#read_all()
+        execute s:py . ' ConqueTerm_Poller.register(' . g:ConqueTerm_Idx . ', ' . g:ConqueTerm_Var . ')'
+
+        " start polling
+        call conque_term#schedule()
+
+        " replace the pooled session we may have just used
+        if s:platform == 'unix' && index(g:ConqueTerm_PoolCommands, command) >= 0
+            call conque_term#pool_schedule()
+        endif
     catch
         echohl WarningMsg | echomsg "An error occurred: " . command | echohl None
         return 0
@@ -539,9 +576,11 @@ function! conque_term#open(...) "{{{
 endfunction "}}}
 
 " open(), but no buffer
-function! conque_term#subprocess(command) " {{{
-    
-    let t_obj = conque_term#open(a:command, [], 0, 0)
+function! conque_term#subprocess(command, ...) " {{{
+
+    let options = get(a:000, 0, {})
+
+    let t_obj = conque_term#open(a:command, [], 0, 0, get(options, 'pipe', 0))
     if !exists('b:ConqueTerm_Var')
         call conque_term#on_blur()
         sil exe s:py . ' ' . g:ConqueTerm_Var . '.idle()'
@@ -570,6 +609,9 @@ function! conque_term#set_buffer_settings(command, vim_startup_commands) "{{{
     setlocal foldcolumn=0      " reasonable left margin
     setlocal nowrap            " default to no wrap (esp with MySQL)
     setlocal noswapfile        " don't bother creating a .swp file
+    if v:version > 704 || (v:version == 704 && has('patch073'))
+        setlocal undolevels=-1 " every line of output would be an undo step (local since VIM 7.4.073)
+    endif
     setlocal scrolloff=0       " don't use buffer lines. it makes the 'clear' command not work as expected
     setlocal sidescrolloff=0   " don't use buffer lines. it makes the 'clear' command not work as expected
     setlocal sidescroll=1      " don't use buffer lines. it makes the 'clear' command not work as expected
@@ -586,6 +628,9 @@ function! conque_term#set_buffer_settings(command, vim_startup_commands) "{{{
     setfiletype conque_term    " useful
     sil exe "setlocal syntax=" . g:ConqueTerm_Syntax
 
+    " typed characters the program hasn't echoed yet
+    highlight default ConquePrediction term=underline cterm=underline gui=underline
+
     " temporary global settings go in here
     call conque_term#on_focus(1)
 
@@ -633,7 +678,10 @@ function! conque_term#set_mappings(action) "{{{
 
         " check for resized/scrolled buffer when entering buffer
         sil exe 'autocmd ' . b:ConqueTerm_Var . ' BufEnter <buffer> ' . s:py . ' ' . b:ConqueTerm_Var . '.update_window_size()'
-        sil exe 'autocmd ' . b:ConqueTerm_Var . ' VimResized ' . s:py . ' ' . b:ConqueTerm_Var . '.update_window_size()'
+
+        " render into memory while the buffer isn't in any window
+        sil exe 'autocmd ' . b:ConqueTerm_Var . ' BufWinLeave <buffer> ' . s:py . ' ' . b:ConqueTerm_Var . '.hide()'
+        sil exe 'autocmd ' . b:ConqueTerm_Var . ' BufWinEnter <buffer> ' . s:py . ' ' . b:ConqueTerm_Var . '.show()'
 
         " set/reset updatetime on entering/exiting buffer
         sil exe 'autocmd ' . b:ConqueTerm_Var . ' BufEnter <buffer> call conque_term#on_focus()'
@@ -642,8 +690,17 @@ function! conque_term#set_mappings(action) "{{{
         " reposition cursor when going into insert mode
         sil exe 'autocmd ' . b:ConqueTerm_Var . ' InsertEnter <buffer> ' . s:py . ' ' . b:ConqueTerm_Var . '.insert_enter()'
 
-        " poll for more output
-        sil exe 'autocmd ' . b:ConqueTerm_Var . ' CursorHoldI <buffer> ' . s:py . ' ' .  b:ConqueTerm_Var . '.auto_read()'
+        " poll for more output, see conque_term#tick() for Vims with timers
+        if !s:use_timers
+            sil exe 'autocmd ' . b:ConqueTerm_Var . ' CursorHoldI <buffer> ' . s:py . ' ' .  b:ConqueTerm_Var . '.auto_read()'
+        else
+            sil exe 'autocmd ' . b:ConqueTerm_Var . ' InsertEnter <buffer> call conque_term#schedule(1)'
+        endif
+
+        " the buffer may have been edited while the terminal was paused
+        if a:action == 'toggle'
+            sil exe s:py . ' ' . b:ConqueTerm_Var . '.resume()'
+        endif
     endif
     " }}}
 
@@ -829,10 +886,10 @@ function! conque_term#set_mappings(action) "{{{
 
     " remap paste keys {{{
     if l:action == 'start'
-        sil exe 'n' . map_modifier . 'map <silent> <buffer> p :' . s:py . ' ' . b:ConqueTerm_Var . '.write_expr("@@")<CR>a'
-        sil exe 'n' . map_modifier . 'map <silent> <buffer> P :' . s:py . ' ' . b:ConqueTerm_Var . '.write_expr("@@")<CR>a'
-        sil exe 'n' . map_modifier . 'map <silent> <buffer> ]p :' . s:py . ' ' . b:ConqueTerm_Var . '.write_expr("@@")<CR>a'
-        sil exe 'n' . map_modifier . 'map <silent> <buffer> [p :' . s:py . ' ' . b:ConqueTerm_Var . '.write_expr("@@")<CR>a'
+        sil exe 'n' . map_modifier . 'map <silent> <buffer> p :' . s:py . ' ' . b:ConqueTerm_Var . '.send_expr("@@")<CR>a'
+        sil exe 'n' . map_modifier . 'map <silent> <buffer> P :' . s:py . ' ' . b:ConqueTerm_Var . '.send_expr("@@")<CR>a'
+        sil exe 'n' . map_modifier . 'map <silent> <buffer> ]p :' . s:py . ' ' . b:ConqueTerm_Var . '.send_expr("@@")<CR>a'
+        sil exe 'n' . map_modifier . 'map <silent> <buffer> [p :' . s:py . ' ' . b:ConqueTerm_Var . '.send_expr("@@")<CR>a'
     else
         sil exe 'n' . map_modifier . 'map <silent> <buffer> p'
         sil exe 'n' . map_modifier . 'map <silent> <buffer> P'
@@ -841,8 +898,8 @@ function! conque_term#set_mappings(action) "{{{
     endif
     if has('gui_running') == 1
         if l:action == 'start'
-            sil exe 'i' . map_modifier . 'map <buffer> <S-Insert> <Esc>:' . s:py . ' ' . b:ConqueTerm_Var . '.write_expr("@+")<CR>a'
-            sil exe 'i' . map_modifier . 'map <buffer> <S-Help> <Esc>:<C-u>' . s:py . ' ' . b:ConqueTerm_Var . '.write_expr("@+")<CR>a'
+            sil exe 'i' . map_modifier . 'map <buffer> <S-Insert> <Esc>:' . s:py . ' ' . b:ConqueTerm_Var . '.send_expr("@+")<CR>a'
+            sil exe 'i' . map_modifier . 'map <buffer> <S-Help> <Esc>:<C-u>' . s:py . ' ' . b:ConqueTerm_Var . '.send_expr("@+")<CR>a'
         else
             sil exe 'i' . map_modifier . 'map <buffer> <S-Insert>'
             sil exe 'i' . map_modifier . 'map <buffer> <S-Help>'
@@ -901,8 +958,16 @@ function! conque_term#init() " {{{
     " abort any remaining running terminals when Vim exits
     autocmd ConqueTerm VimLeave * call conque_term#close_all()
 
+    " resize terminals once their windows stop changing size
+    autocmd ConqueTerm VimResized * call conque_term#resize_event()
+    if exists('##WinResized')
+        autocmd ConqueTerm WinResized * call conque_term#resize_event()
+    else
+        autocmd ConqueTerm WinEnter * call conque_term#resize_event()
+    endif
+
     " read more output when this isn't the current buffer
-    if g:ConqueTerm_ReadUnfocused == 1
+    if g:ConqueTerm_ReadUnfocused == 1 && !s:use_timers
         autocmd ConqueTerm CursorHold * call conque_term#read_all(0)
     endif
 
@@ -911,26 +976,59 @@ function! conque_term#init() " {{{
 endfunction " }}}
 
 " read from all known conque buffers
-function! conque_term#read_all(insert_mode) "{{{
+function! conque_term#read_all(insert_mode, ...) "{{{
 
-    for i in range(1, g:ConqueTerm_Idx)
+    " CursorHold needs key presses to fire again, timers don't
+    let restart_updatetime = get(a:000, 0, 1)
+
+    " terminal being read by auto_read() instead
+    let skip_idx = get(a:000, 1, 0)
+
+    " the terminal being typed in, or looked at, goes first
+    let current = skip_idx
+    if !current && exists('b:ConqueTerm_Idx')
+        let current = b:ConqueTerm_Idx
+    endif
+
+    " find terminals with new output, with a single non-blocking poll
+    let ready = []
+    sil exe s:py . ' vim.command("let ready = " + str(ConqueTerm_Poller.schedule(ConqueTerm_Poller.poll(), ' . current . ', ' . g:ConqueTerm_BackgroundBudget . ')))'
+
+    for i in ready
         try
-            if !g:ConqueTerm_Terminals[i].active
+            if !g:ConqueTerm_Terminals[i].active || i == skip_idx
                 continue
             endif
 
-            let output = g:ConqueTerm_Terminals[i].read(1)
+            let output = g:ConqueTerm_Terminals[i].read(0)
 
             if !g:ConqueTerm_Terminals[i].is_buffer && exists('*g:ConqueTerm_Terminals[i].callback')
                 call g:ConqueTerm_Terminals[i].callback(output)
             endif
+
+            if !g:ConqueTerm_Terminals[i].is_buffer && exists('*g:ConqueTerm_Terminals[i].stderr_callback')
+                let errors = g:ConqueTerm_Terminals[i].read_stderr()
+                if errors != ''
+                    call g:ConqueTerm_Terminals[i].stderr_callback(errors)
+                endif
+            endif
         catch
             " probably a deleted buffer
         endtry
     endfor
 
+    " handle subprocesses which exited, after their last output was read
+    let exited = []
+    sil exe s:py . ' vim.command("let exited = " + str(ConqueTerm_Poller.exited()))'
+
+    for i in exited
+        call conque_term#exited(i)
+    endfor
+
     " restart updatetime
-    if a:insert_mode
+    if !restart_updatetime
+        return
+    elseif a:insert_mode
         "call feedkeys("\<C-o>f\e", "n")
         let p = getpos('.')
         if p[1] == 1
@@ -948,6 +1046,29 @@ endfunction "}}}
 " close all subprocesses
 function! conque_term#close_all() "{{{
 
+    " Vim is exiting, so only signal the processes and let them all exit together
+    if s:platform == 'unix' && s:initialized == 1
+        for i in range(1, g:ConqueTerm_Idx)
+            try
+                if g:ConqueTerm_Terminals[i].active
+                    sil exe s:py . ' ' . g:ConqueTerm_Terminals[i].var . '.abort()'
+                    let g:ConqueTerm_Terminals[i].active = 0
+                endif
+            catch
+                " probably already dead
+            endtry
+        endfor
+
+        " idle pooled sessions
+        execute s:py . ' ConqueTerm_Pool.close_all()'
+
+        " wait at most g:ConqueTerm_CloseTimeout, then kill what is left
+        execute s:py . ' ConqueTerm_Reaper.finish()'
+
+        let g:ConqueTerm_TerminalsString = string(g:ConqueTerm_Terminals)
+        return
+    endif
+
     for i in range(1, g:ConqueTerm_Idx)
         try
             call g:ConqueTerm_Terminals[i].close()
@@ -958,25 +1079,254 @@ function! conque_term#close_all() "{{{
 
 endfunction "}}}
 
+" Expand a log file name pattern, %i being the terminal number
+function! conque_term#log_file_name(pattern, idx) "{{{
+
+    if a:pattern == ''
+        return ''
+    endif
+
+    let file_name = substitute(a:pattern, '%i', a:idx, 'g')
+    if exists('*strftime')
+        let file_name = strftime(file_name)
+    endif
+
+    return expand(file_name)
+
+endfunction "}}}
+
+" Timer driven polling, replaces CursorHold events and feedkeys() where available
+function! conque_term#tick(timer) "{{{
+
+    let s:tick_timer = -1
+
+    try
+        " the current terminal, while typing in it
+        let current_idx = 0
+        if exists('b:ConqueTerm_Idx') && mode() == 'i' && g:ConqueTerm_Terminals[b:ConqueTerm_Idx].active
+            let current_idx = b:ConqueTerm_Idx
+            sil exe s:py . ' ' . b:ConqueTerm_Var . '.auto_read(False)'
+        endif
+
+        " everything else
+        if g:ConqueTerm_ReadUnfocused == 1
+            call conque_term#read_all(mode() == 'i', 0, current_idx)
+        endif
+    finally
+        call conque_term#schedule()
+    endtry
+
+endfunction "}}}
+
+" Window size changed, wait for it to settle before resizing terminals
+function! conque_term#resize_event() "{{{
+
+    if !s:use_timers || g:ConqueTerm_ResizeDelay <= 0
+        call conque_term#resize_all(-1)
+        return
+    endif
+
+    " dragging a split sends lots of these
+    if s:resize_timer != -1
+        call timer_stop(s:resize_timer)
+    endif
+    let s:resize_timer = timer_start(g:ConqueTerm_ResizeDelay, 'conque_term#resize_all')
+
+endfunction "}}}
+
+" Tell the programs in all visible terminals about their window size
+function! conque_term#resize_all(timer) "{{{
+
+    let s:resize_timer = -1
+
+    " one window per terminal, the current window decides for a terminal shown twice
+    let current = winnr()
+    let term_wins = {}
+    for w in filter(range(1, winnr('$')), 'v:val != ' . current) + [current]
+        let idx = getbufvar(winbufnr(w), 'ConqueTerm_Idx')
+        if idx == '' || !has_key(g:ConqueTerm_Terminals, idx) || !g:ConqueTerm_Terminals[idx].active
+            continue
+        endif
+        if !has_key(term_wins, idx) || w == current
+            let term_wins[idx] = w
+        endif
+    endfor
+
+    for idx in keys(term_wins)
+        let w = term_wins[idx]
+
+        " WinEnter fires on every window switch, most of the time nothing changed.
+        " The size the pty was last given is kept by Conque.update_window_size()
+        if getbufvar(winbufnr(w), 'ConqueTerm_WindowSize', []) == [winheight(w), winwidth(w)]
+            continue
+        endif
+
+        let cmd = 'sil ' . s:py . ' ' . g:ConqueTerm_Terminals[idx].var . '.update_window_size()'
+        if w == current
+            exe cmd
+        elseif exists('*win_execute')
+            call win_execute(win_getid(w), cmd)
+        endif
+    endfor
+
+endfunction "}}}
+
+" Start the poll timer, or restart it with an interval for the current buffer.
+" Pass 1 from InsertEnter, when mode() doesn't say insert yet
+function! conque_term#schedule(...) "{{{
+
+    if !s:use_timers
+        return
+    endif
+
+    if s:tick_timer != -1
+        call timer_stop(s:tick_timer)
+        let s:tick_timer = -1
+    endif
+
+    " nothing to poll for
+    let active = 0
+    for t_obj in values(g:ConqueTerm_Terminals)
+        if t_obj.active
+            let active = 1
+            break
+        endif
+    endfor
+    if !active
+        return
+    endif
+
+    " poll as soon as the first terminal is due, see Conque.poll_update()
+    if g:ConqueTerm_ReadUnfocused == 1
+        let idxs = keys(g:ConqueTerm_Terminals)
+    elseif exists('b:ConqueTerm_Idx') && get(a:000, 0, mode() == 'i')
+        let idxs = [b:ConqueTerm_Idx]
+    else
+        " conque_term#tick() only reads the current terminal in insert mode,
+        " InsertEnter or conque_term#on_focus() will start polling again
+        return
+    endif
+
+    let interval = 0
+    sil exe s:py . ' vim.command("let interval = " + str(ConqueTerm_Poller.next_interval(' . string(idxs) . ')))'
+
+    if interval > 0
+        let s:tick_timer = timer_start(interval, 'conque_term#tick')
+    endif
+
+endfunction "}}}
+
+" Start idle sessions for g:ConqueTerm_PoolCommands the next time Vim is idle
+function! conque_term#pool_schedule() "{{{
+
+    augroup ConqueTermPool
+    autocmd!
+    autocmd CursorHold,CursorHoldI * call conque_term#pool_fill()
+    augroup END
+
+endfunction "}}}
+
+" Top up the pool of pre-started sessions
+function! conque_term#pool_fill() "{{{
+
+    " only needs to run once per schedule
+    augroup ConqueTermPool
+    autocmd!
+    augroup END
+
+    if empty(g:ConqueTerm_PoolCommands) || !conque_term#dependency_check()
+        return
+    endif
+
+    " close pooled sessions on exit
+    call conque_term#init()
+
+    if s:platform != 'unix'
+        return
+    endif
+
+    if g:ConqueTerm_PoolIdle > 0
+        execute s:py . ' ConqueTerm_Pool.expire(' . g:ConqueTerm_PoolIdle . ')'
+    endif
+
+    execute s:py . ' ConqueTerm_Pool.fill(vim.eval("g:ConqueTerm_PoolCommands"), int(vim.eval("g:ConqueTerm_PoolSize")), vim.eval("g:ConqueTerm_TERM"), vim.eval("g:ConqueTerm_Encoding"), vim.current.window.height, vim.current.window.width)'
+
+    " close the new sessions again if nobody takes them
+    if s:use_timers && g:ConqueTerm_PoolIdle > 0
+        call timer_stop(s:pool_timer)
+        let s:pool_timer = timer_start(g:ConqueTerm_PoolIdle * 1000 + 1000, 'conque_term#pool_expire')
+    endif
+
+endfunction "}}}
+
+" Close pooled sessions which have been idle for longer than g:ConqueTerm_PoolIdle
+function! conque_term#pool_expire(timer) "{{{
+
+    let s:pool_timer = -1
+    execute s:py . ' ConqueTerm_Pool.expire(' . g:ConqueTerm_PoolIdle . ')'
+
+endfunction "}}}
+
+" called when a terminal's subprocess has exited
+function! conque_term#exited(idx) " {{{
+
+    let t_obj = g:ConqueTerm_Terminals[a:idx]
+    if !t_obj.active || t_obj.exited
+        return
+    endif
+
+    " record exit status for hooks
+    let t_obj.exited = 1
+    sil exe s:py . ' conque_tmp = ' . t_obj.var . '.get_exit_status()'
+    sil exe s:py . ' vim.command("let t_obj.exit_status = " + (conque_tmp is None and "\"\"" or str(conque_tmp)))'
+
+    call conque_term#call_hooks('after_exit', t_obj)
+
+    " close() works on the current buffer, so buffers elsewhere are closed when next entered
+    if t_obj.is_buffer && !(exists('b:ConqueTerm_Idx') && b:ConqueTerm_Idx == a:idx)
+        sil exe s:py . ' ConqueTerm_Poller.unregister(' . a:idx . ')'
+        return
+    endif
+
+    call t_obj.close()
+
+endfunction " }}}
+
 " gets called when user enters conque buffer.
 " Useful for making temp changes to global config
 function! conque_term#on_focus(...) " {{{
 
     let startup = get(a:000, 0, 0)
 
+    " finish closing a terminal which exited while in the background
+    if startup == 0 && exists('b:ConqueTerm_Idx')
+        let t_obj = g:ConqueTerm_Terminals[b:ConqueTerm_Idx]
+        if t_obj.active && t_obj.exited
+            call t_obj.close()
+            return
+        endif
+    endif
+
     " Disable NeoComplCache. It has global hooks on CursorHold and CursorMoved :-/
     let s:NeoComplCache_WasEnabled = exists(':NeoComplCacheLock')
     if s:NeoComplCache_WasEnabled == 2
         NeoComplCacheLock
     endif
  
-    if g:ConqueTerm_ReadUnfocused == 1
-        autocmd! ConqueTerm CursorHoldI *
-        autocmd! ConqueTerm CursorHold *
-    endif
+    " set poll interval to 50ms, or with timers start polling quickly
+    if s:use_timers
+        if startup == 0 && exists('b:ConqueTerm_Var')
+            sil exe s:py . ' ' . b:ConqueTerm_Var . '.poll_reset()'
+        endif
+        call conque_term#schedule()
+    else
+        if g:ConqueTerm_ReadUnfocused == 1
+            autocmd! ConqueTerm CursorHoldI *
+            autocmd! ConqueTerm CursorHold *
+        endif
 
-    " set poll interval to 50ms
-    set updatetime=50
+        set updatetime=50
+    endif
 
     " resume subprocess fast polling
     if startup == 0 && exists('b:ConqueTerm_Var')
@@ -1009,7 +1359,9 @@ function! conque_term#on_blur() " {{{
     endif
 
     " reset poll interval
-    if g:ConqueTerm_ReadUnfocused == 1
+    if s:use_timers
+        " the timer picks the interval for the next buffer when it fires
+    elseif g:ConqueTerm_ReadUnfocused == 1
         set updatetime=1000
         autocmd ConqueTerm CursorHoldI * call conque_term#read_all(1)
         autocmd ConqueTerm CursorHold * call conque_term#read_all(0)
@@ -1232,8 +1584,8 @@ function! conque_term#send_selected(type) "{{{
     " go to terminal buffer
     call term.focus()
 
-    " execute yanked text
-    call term.write(@@)
+    " stream yanked text
+    call term.send(@@)
 
     " reset original values
     let @@ = reg_save
@@ -1246,16 +1598,15 @@ endfunction "}}}
 
 function! conque_term#send_file() "{{{
 
-    let file_lines = readfile(expand('%:p'))
-    if type(file_lines) == 3 && len(file_lines) > 0
+    let file_name = expand('%:p')
+    if filereadable(file_name)
         let term = conque_term#get_instance()
+        let file_encoding = &fileencoding != '' ? &fileencoding : &encoding
         call term.focus()
 
-        for line in file_lines
-            call term.writeln(line)
-        endfor
+        call term.send_file(file_name, file_encoding)
     else
-        echomsg 'Could not read file: ' . expand('%:p')
+        echomsg 'Could not read file: ' . file_name
     endif
 
 endfunction "}}}
@@ -1339,6 +1690,39 @@ function! s:term_obj.writeln(...) dict " {{{
 
 endfunction " }}}
 
+" stream a large block of text to the terminal
+function! s:term_obj.send(text) dict " {{{
+
+    sil exe s:py . ' ' . self.var . '.send_expr("a:text")'
+
+endfunction " }}}
+
+" stream the contents of a file to the terminal
+function! s:term_obj.send_file(file_name, ...) dict " {{{
+
+    let file_encoding = get(a:000, 0, 'utf-8')
+
+    sil exe s:py . ' ' . self.var . '.send_file(vim.eval("a:file_name"), vim.eval("file_encoding"))'
+
+endfunction " }}}
+
+" progress of the current or last send, as [characters sent, total characters]
+function! s:term_obj.send_progress() dict " {{{
+
+    let progress = [0, 0]
+    sil exe s:py . ' vim.command("let progress = " + str(' . self.var . '.get_send_progress()))'
+
+    return progress
+
+endfunction " }}}
+
+" stop sending text
+function! s:term_obj.cancel_send() dict " {{{
+
+    sil exe s:py . ' ' . self.var . '.cancel_send()'
+
+endfunction " }}}
+
 " move cursor to terminal buffer
 function! s:term_obj.focus() dict " {{{
 
@@ -1393,12 +1777,93 @@ function! s:term_obj.set_callback(callback_func) dict " {{{
 
 endfunction " }}}
 
+" set stderr output callback, for subprocesses started with pipes
+function! s:term_obj.set_stderr_callback(callback_func) dict " {{{
+
+    let g:ConqueTerm_Terminals[self.idx].stderr_callback = function(a:callback_func)
+    sil exe s:py . ' ' . self.var . '.merge_stderr = False'
+
+endfunction " }}}
+
+" read stderr output from a subprocess started with pipes
+function! s:term_obj.read_stderr() dict " {{{
+
+    let output = ''
+
+    sil exec s:py . " conque_tmp = " . self.var . ".read_stderr()"
+
+    try
+        let pycode = "\nif conque_tmp:\n    conque_tmp = re.sub('\\\\\\\\', '\\\\\\\\\\\\\\\\', conque_tmp)\n    conque_tmp = re.sub('\"', '\\\\\\\\\"', conque_tmp)\n    vim.command('let output = \"' + conque_tmp + '\"')\n"
+        sil exec s:py . pycode
+    catch
+        " d'oh
+    endtry
+
+    return output
+
+endfunction " }}}
+
+" change the character encoding used to talk to the subprocess
+function! s:term_obj.set_encoding(encoding) dict " {{{
+
+    sil exe s:py . ' ' . self.var . '.set_encoding(vim.eval("a:encoding"))'
+
+endfunction " }}}
+
+" write a transcript of this terminal's session to a file
+function! s:term_obj.start_log(file_name, ...) dict " {{{
+
+    let log_input = get(a:000, 0, g:ConqueTerm_LogInput)
+    let compress = get(a:000, 1, g:ConqueTerm_LogCompress)
+    let file_name = conque_term#log_file_name(a:file_name, self.idx)
+
+    let started = 0
+    sil exe s:py . ' vim.command("let started = " + str(int(' . self.var . '.start_log(vim.eval("file_name"), ' . log_input . ', ' . compress . '))))'
+
+    return started
+
+endfunction " }}}
+
+" stop writing the session transcript
+function! s:term_obj.stop_log() dict " {{{
+
+    sil exe s:py . ' ' . self.var . '.stop_log()'
+
+endfunction " }}}
+
+" put lines trimmed from the scrollback back above the top of the buffer
+function! s:term_obj.load_history(...) dict " {{{
+
+    let lines = str2nr(get(a:000, 0, 0))
+
+    let loaded = 0
+    sil exe s:py . ' vim.command("let loaded = " + str(' . self.var . '.load_history(' . lines . ')))'
+
+    if loaded == 0
+        echohl WarningMsg | echomsg "No more history" | echohl None
+    endif
+
+    return loaded
+
+endfunction " }}}
+
+" get performance counters for this terminal
+function! s:term_obj.get_stats() dict " {{{
+
+    let stats = {}
+    sil exe s:py . ' vim.command("let stats = " + str(' . self.var . '.get_stats()))'
+
+    return stats
+
+endfunction " }}}
+
 " close subprocess with ABORT signal
 function! s:term_obj.close() dict " {{{
 
     " kill process
     try
         sil exe s:py . ' ' . self.var . '.abort()'
+        sil exe s:py . ' ConqueTerm_Poller.unregister(' . self.idx . ')'
     catch
         " probably already dead
     endtry
@@ -1493,6 +1958,7 @@ function! conque_term#load_python() " {{{
 
     exec s:py . "file " . s:scriptdirpy . "conque_globals.py"
     exec s:py . "file " . s:scriptdirpy . "conque.py"
+    exec s:py . "file " . s:scriptdirpy . "conque_poller.py"
     if s:platform == 'windows'
         exec s:py . "file " . s:scriptdirpy . "conque_win32_util.py"
         exec s:py . "file " . s:scriptdirpy . "conque_sole_shared_memory.py"
@@ -1500,7 +1966,14 @@ function! conque_term#load_python() " {{{
         exec s:py . "file " . s:scriptdirpy . "conque_sole_wrapper.py"
     else
         exec s:py . "file " . s:scriptdirpy . "conque_screen.py"
+        exec s:py . "file " . s:scriptdirpy . "conque_reader.py"
+        exec s:py . "file " . s:scriptdirpy . "conque_reaper.py"
+        exec s:py . "file " . s:scriptdirpy . "conque_log.py"
+        exec s:py . "file " . s:scriptdirpy . "conque_history.py"
         exec s:py . "file " . s:scriptdirpy . "conque_subprocess.py"
+        exec s:py . "file " . s:scriptdirpy . "conque_pipe_subprocess.py"
+        exec s:py . "file " . s:scriptdirpy . "conque_pipe.py"
+        exec s:py . "file " . s:scriptdirpy . "conque_pool.py"
     endif
 
 endfunction " }}}
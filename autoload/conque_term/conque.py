@@ -48,7 +48,7 @@ Usage:
 import vim
 import re
 import math
-import time # DEBUG
+import time
 
 class Conque:
 
@@ -114,6 +114,115 @@ class Conque:
     # input buffer, array of ordinals
     input_buffer = []
 
+    # subprocess was taken from the pool of pre-started sessions
+    pooled = False
+
+    # syntax commands waiting for the terminal buffer to become current
+    pending_syntax = None
+
+    # too many syntax commands were queued, redo all colors from color_history instead
+    syntax_overflow = False
+
+    # window title set by the program, applied at the end of read() if it changed
+    pending_title = None
+    title = None
+
+    # bell rung by the program, and when the last one was shown
+    pending_bell = False
+    last_bell = 0
+
+    # milliseconds of parsing allowed per read(), 0 for no limit
+    read_budget = 8
+
+    # output chunks left unparsed when the budget ran out
+    pending_output = None
+
+    # number of read() calls by time taken, see CONQUE_READ_HISTOGRAM
+    read_histogram = None
+    deferred_reads = 0
+
+    # output characters parsed and milliseconds spent parsing them
+    bytes_parsed = 0
+    parse_time = 0.0
+
+    # when output was last parsed, the least recently served terminal is read first
+    last_parse = 0
+
+    # read() limited to a share of the background budget, see ConquePoller.schedule()
+    read_share = False
+
+    # longest wait for the echo of typed input in milliseconds, 0 to only wait 1ms
+    echo_max = 0
+
+    # smoothed delay before typed input is echoed, in milliseconds
+    echo_delay = None
+    echo_timeouts = 0
+
+    # timeouts in a row, waiting stops at CONQUE_ECHO_MAX_MISSES until input is echoed again
+    echo_misses = 0
+
+    # when input was last written without waiting for its echo, while waiting is stopped
+    echo_sent = 0
+
+    # key presses by time until their echo was drawn, see CONQUE_READ_HISTOGRAM
+    echo_histogram = None
+
+    # when read() last got new output from the subprocess
+    output_time = 0
+
+    # lines kept above the screen, 0 for no limit
+    scrollback = 0
+
+    # lines deleted by trim_scrollback() so far
+    trimmed_lines = 0
+
+    # compressed copy of the deleted lines, see load_history()
+    history = None
+
+    # lines paged back from the history, kept until the next insert mode
+    history_loaded = 0
+
+    # bytes of memory a terminal may hold, 0 for no limit, see enforce_memory()
+    memory_limit = 0
+    memory_checked = 0
+    memory_trims = 0
+
+    # draw typed characters before the program echoes them
+    predict_echo = False
+
+    # typed characters waiting for their echo, see predict_input()
+    prediction = None
+
+    # stop drawing predictions after a wrong one, until an echo matches again
+    predict_suspended = False
+    predict_hits = 0
+    predict_misses = 0
+
+    # adaptive poll interval in milliseconds, see poll_update()
+    poll_min = 5
+    poll_max = 1000
+    poll_interval = 5
+
+    # when this terminal is next due to be polled, from time.time()
+    poll_next = 0
+
+    # number of polls, and when polling started
+    poll_count = 0
+    poll_start = 0
+
+    # application has enabled bracketed paste mode
+    bracketed_paste = False
+
+    # text being streamed to the subprocess by send_text()
+    send_buffer = None
+    send_pos = 0
+
+    # [start, end] positions in send_buffer of each bracketed paste, markers included
+    send_pastes = None
+
+    # characters handed to the subprocess per chunk during a bulk send
+    send_chunk_size = 4096
+
     def open(self):
         """ Start program and initialize this instance. 
 
@@ -128,6 +237,22 @@ class Conque:
 
         # create terminal screen instance
         self.screen = ConqueScreen()
+        self.pending_syntax = []
+        self.color_history = {}
+        self.color_changes = {}
+        self.read_histogram = [0] * (len(CONQUE_READ_HISTOGRAM) + 1)
+
+        # limit the time spent parsing per read
+        self.read_budget = int(options['read_budget'])
+
+        # learn how long to wait for typed input to be echoed
+        self.echo_max = int(options['echo_wait'])
+        self.echo_histogram = [0] * (len(CONQUE_READ_HISTOGRAM) + 1)
+        self.predict_echo = bool(int(options['predict_echo']))
+        self.scrollback = max(0, int(options['scrollback']))
+        if self.scrollback and int(options['history']):
+            self.history = ConqueHistory()
+        self.memory_limit = max(0, int(options['memory_limit'])) * 1024 * 1024
 
         # int vars
         self.columns = vim.current.window.width
@@ -146,9 +271,29 @@ class Conque:
         # init tabstops
         self.init_tabstops()
 
-        # open command
-        self.proc = ConqueSubprocess()
-        self.proc.open(command, {'TERM': options['TERM'], 'CONQUE': '1', 'LINES': str(self.lines), 'COLUMNS': str(self.columns)})
+        # open command, using an idle pre-started session if it's a pooled command
+        self.proc = None
+        if int(options['pool']):
+            self.proc = ConqueTerm_Pool.take(command, options['TERM'], options['encoding'])
+        self.pooled = self.proc is not None
+
+        if not self.pooled:
+            self.proc = ConqueSubprocess()
+            self.proc.open(command, {'TERM': options['TERM'], 'CONQUE': '1', 'LINES': str(self.lines), 'COLUMNS': str(self.columns)}, options['encoding'])
+
+        # grace period for close() before everything is killed
+        self.proc.close_timeout = int(options['close_timeout'])
+
+        # session transcript
+        if options['log_file']:
+            self.start_log(options['log_file'], int(options['log_input']), int(options['log_compress']))
+
+        # poll quickly to begin with, the program is probably starting up
+        self.init_polling(options)
+
+        # keep draining output while Vim is busy or the buffer is unfocused
+        if int(options['read_thread']):
+            self.proc.start_reader(int(options['read_buffer_size']))
 
         # send window size signal, in case LINES/COLUMNS is ignored
         self.update_window_size(True)
@@ -164,9 +309,68 @@ class Conque:
         # write and read
         self.proc.write(input)
 
+        # show typed characters without waiting for the round trip
+        if self.predict_echo:
+            self.predict_input(input)
+
+        # expect a response soon
+        self.poll_reset()
+
         # read output immediately
         if read:
+            self.read_echo(set_cursor)
+
+    def read_echo(self, set_cursor=True):
+        """ Read the response to input which was just written.
+
+        Waits up to about twice the usual echo delay of this terminal, returning as
+        soon as output arrives. The delay is learned with an exponentially weighted
+        moving average, so slow connections get a longer wait than local shells.
+        After a few key presses in a row get no echo, e.g. at a password prompt, it
+        stops waiting until output follows input quickly again.
+
+        """
+        # input isn't being echoed at the moment
+        if self.echo_misses >= CONQUE_ECHO_MAX_MISSES:
+            self.echo_sent = time.time()
             self.read(1, set_cursor)
+            return
+
+        # nothing to learn from, output still waiting to be parsed, or the echo was predicted
+        if not self.echo_max or self.pending_output or (self.prediction and self.prediction['drawn']):
+            self.read(1, set_cursor)
+            return
+
+        wait = self.echo_wait()
+        start = time.time()
+        self.output_time = 0
+
+        self.read(wait, set_cursor)
+
+        if self.output_time:
+            self.count_time(self.echo_histogram, (time.time() - start) * 1000)
+            self.learn_echo_delay((self.output_time - start) * 1000)
+            self.echo_misses = 0
+        else:
+            # no echo, e.g. a password prompt. Says nothing about the delay
+            self.echo_timeouts += 1
+            self.echo_misses += 1
+
+    def learn_echo_delay(self, sample):
+        """ Add an echo delay in milliseconds to the smoothed average """
+
+        if self.echo_delay is None:
+            self.echo_delay = sample
+        else:
+            self.echo_delay += CONQUE_ECHO_WEIGHT * (sample - self.echo_delay)
+
+    def echo_wait(self):
+        """ Milliseconds to wait for the echo of typed input """
+
+        if self.echo_delay is None:
+            return self.echo_max
+
+        return max(1, min(self.echo_max, int(self.echo_delay * 2) + 1))
 
 
 
@@ -213,6 +417,106 @@ class Conque:
             self.write(input, set_cursor, read)
 
 
+    def send_text(self, text):
+        """ Stream a large block of text to the subprocess.
+
+        The text is handed over in chunks, only as fast as the subprocess accepts it,
+        and output is rendered at the normal polling rate rather than after every
+        chunk. Newlines are sent as carriage returns, like pressing <Enter>. If the
+        application has enabled bracketed paste mode, the text is sent as a paste.
+
+        """
+        text = text.replace(u('\r\n'), u('\r')).replace(u('\n'), u('\r'))
+
+        if self.bracketed_paste:
+            text = CONQUE_PASTE_START + text + CONQUE_PASTE_END
+
+        # append to a send already in progress
+        if self.send_buffer is not None:
+            start = len(self.send_buffer)
+            self.send_buffer = self.send_buffer + text
+        else:
+            start = 0
+            self.send_buffer = text
+            self.send_pos = 0
+            self.send_pastes = []
+
+        if self.bracketed_paste:
+            self.send_pastes.append([start, start + len(text)])
+
+        self.pump_send()
+
+
+    def send_expr(self, expr):
+        """ Stream the value of a Vim expression to the subprocess. """
+
+        try:
+            if CONQUE_PYTHON_VERSION == 2:
+                self.send_text(unicode(vim.eval(expr), CONQUE_VIM_ENCODING, 'ignore'))
+            else:
+                self.send_text(vim.eval(expr))
+        except:
+            logging.info(traceback.format_exc())
+            pass
+
+
+    def send_file(self, path, encoding='utf-8'):
+        """ Stream the contents of a file to the subprocess. """
+
+        try:
+            f = open(path, 'rb')
+            try:
+                text = f.read().decode(encoding or 'utf-8', 'replace')
+            finally:
+                f.close()
+        except:
+            logging.info(traceback.format_exc())
+            return
+
+        self.send_text(text)
+
+
+    def pump_send(self):
+        """ Hand the next chunks of a bulk send to the subprocess, while it keeps up. """
+
+        while self.send_buffer is not None and not self.proc.queued():
+            chunk = self.send_buffer[self.send_pos:self.send_pos + self.send_chunk_size]
+            self.send_pos += len(chunk)
+
+            if self.send_pos >= len(self.send_buffer):
+                self.send_buffer = None
+
+            self.write(chunk, set_cursor=False, read=False)
+
+
+    def get_send_progress(self):
+        """ Return the number of characters sent and the total, for the current or last bulk send. """
+
+        if self.send_buffer is None:
+            return [self.send_pos, self.send_pos]
+
+        return [self.send_pos, len(self.send_buffer)]
+
+
+    def cancel_send(self):
+        """ Stop a bulk send. Text already handed to the subprocess is not recalled. """
+
+        if self.send_buffer is None:
+            return
+
+        # close the paste cut off in the middle, finishing any marker which was partly sent
+        for (start, end) in self.send_pastes:
+            if start < self.send_pos < end:
+                close = u('')
+                if self.send_pos < start + len(CONQUE_PASTE_START):
+                    close = CONQUE_PASTE_START[self.send_pos - start:]
+                close += CONQUE_PASTE_END[max(0, self.send_pos - (end - len(CONQUE_PASTE_END))):]
+                self.write(close, set_cursor=False, read=False)
+
+        self.send_buffer = None
+        self.send_pastes = None
+
+
     def write_buffered_ord(self, chr):
         """ Add character ordinal to input buffer. In case we're not allowed to modify buffer a time of input. """
         self.input_buffer.append(chr)
@@ -234,40 +538,91 @@ class Conque:
 
         """
         output = ''
+        start = time.time()
+
+        # background terminals get their share of the time left this tick
+        budget = self.read_budget
+        shared = self.read_share
+        if shared:
+            self.read_share = False
+            budget = ConqueTerm_Poller.take_share(budget)
 
         # this may not actually work
         try:
 
-            # read from subprocess and strip null characters
-            output = self.proc.read(timeout)
+            # continue with the output left from last time
+            if self.pending_output and update_buffer:
+                chunks = self.pending_output
+                self.pending_output = None
+                self.poll_update(True)
 
-            if output == '':
-                return
+                # keep draining the subprocess so its exit is seen after its last output,
+                # unless it's printing faster than we can parse
+                if len(chunks) < CONQUE_MAX_PENDING_OUTPUT:
+                    output = self.proc.read(0)
+                    if output != '':
+                        chunks = chunks + CONQUE_SEQ_REGEX.split(output.replace(chr(0), ''))
 
-            # for bufferless terminals
-            if not update_buffer:
-                return output
+            else:
+                # read from subprocess and strip null characters
+                output = self.proc.read(timeout)
+
+                self.poll_update(output != '')
+
+                if output == '':
+                    self.expire_prediction()
+                    return
+
+                # the budget is for parsing, not for waiting on output
+                start = time.time()
+                self.output_time = start
+
+                # output soon after unechoed input, start waiting for the echo again
+                if self.echo_sent and self.output_time - self.echo_sent < self.echo_max / 1000.0:
+                    self.echo_misses = 0
+                    self.echo_sent = 0
 
-            logging.debug(output)
+                # for bufferless terminals
+                if not update_buffer:
+                    return output
 
-            # strip null characters. I'm still not sure why they appear
-            output = output.replace(chr(0), '')
+                logging.debug(output)
 
-            # split input into individual escape sequences, control codes, and text output
-            chunks = CONQUE_SEQ_REGEX.split(output)
+                # strip null characters. I'm still not sure why they appear
+                output = output.replace(chr(0), '')
+
+                # split input into individual escape sequences, control codes, and text output
+                chunks = CONQUE_SEQ_REGEX.split(output)
 
             logging.debug(str(chunks))
 
+            # take back predicted echo, the real output decides
+            guess = self.take_prediction()
+
             # if there were no escape sequences, skip processing and treat entire string as plain text
             if len(chunks) == 1:
                 self.plain_text(chunks[0])
 
             # loop through and process escape sequences
             else:
-                for s in chunks:
+                deadline = start + float(budget) / 1000
+                parsed = False
+
+                for i in range(len(chunks)):
+                    s = chunks[i]
+
                     if s == '':
                         continue
 
+                    # out of time, leave the rest for the next read. Always parse something,
+                    # so a read makes progress however slow the tick was
+                    if budget and parsed and time.time() > deadline:
+                        self.pending_output = chunks[i:]
+                        self.deferred_reads += 1
+                        break
+
+                    parsed = True
+
                     #logging.debug(str(s) + '--------------------------------------------------------------')
                     logging.debug('at line ' + str(self.l) + ' column ' + str(self.c))
 
@@ -328,12 +683,28 @@ class Conque:
                     else:
                         self.plain_text(s)
 
-            # set cusor position
-            if set_cursor:
-                self.screen.set_cursor(self.l, self.c)
+            # title, bell, window size and cursor, once per read
+            self.apply_effects(set_cursor)
 
-            # we need to set the cursor position
-            self.cursor_set = False
+            if guess:
+                self.check_prediction(guess)
+
+            self.trim_scrollback()
+
+            # time spent in this read
+            elapsed = (time.time() - start) * 1000
+            self.count_time(self.read_histogram, elapsed)
+
+            self.bytes_parsed += len(output)
+            self.parse_time += elapsed
+
+            # counting memory reads the whole buffer, so only do it every so often
+            if self.memory_limit and self.bytes_parsed - self.memory_checked >= CONQUE_MEMORY_CHECK_BYTES:
+                self.memory_checked = self.bytes_parsed
+                self.enforce_memory()
+            self.last_parse = start
+            if shared:
+                ConqueTerm_Poller.spend(elapsed)
 
         except:
             logging.info('read error')
@@ -347,7 +718,7 @@ class Conque:
                 return output.encode(CONQUE_VIM_ENCODING, 'replace')
 
 
-    def auto_read(self):
+    def auto_read(self, reset_timer=True):
         """ Poll program for more output. 
 
         Since Vim doesn't have a reliable event system that can be triggered when new
@@ -355,22 +726,35 @@ class Conque:
         method is called many times a second when the terminal buffer is active, so it
         needs to be very fast and efficient.
 
-        The feedkeys portion is required to reset Vim's timer system. The timer is used
-        to execute this command, typically set to go off after 50 ms of inactivity.
+        Without timers, the feedkeys portion is required to reset Vim's CursorHoldI
+        event, typically set to go off after 50 ms of inactivity. Vims with timer
+        support call this from conque_term#tick() with reset_timer=False instead.
 
         """
-        # process buffered input if any
+        # process buffered input if any, coalesced into a single write
         if len(self.input_buffer):
-            for chr in self.input_buffer:
-                self.write_ord(chr, set_cursor=False, read=False)
+            self.write(u('').join([uchr(c) for c in self.input_buffer]), set_cursor=False, read=False)
             self.input_buffer = []
-            self.read(1)
+            self.read_echo()
+
+        # retry input the pty couldn't take last time
+        elif self.proc.queued():
+            self.proc.flush()
+
+        # keep bulk sends flowing
+        if self.send_buffer is not None:
+            self.pump_send()
+
+        # subprocess exit is noticed while reading, see ConqueSubprocess.read()
+        if self.has_exited() and not self.pending_output:
+            vim.command('call conque_term#exited(conque_term#get_instance().idx)')
+            return
 
-        # check subprocess status, but not every time since it's CPU expensive
+        # occasional housekeeping
         if self.read_count % 32 == 0:
-            if not self.proc.is_alive():
-                vim.command('call conque_term#get_instance().close()')
-                return
+
+            # reap background terminals, even if nothing is reading them
+            ConqueTerm_Poller.reap()
 
             if self.read_count > 512:
                 self.read_count = 0
@@ -386,7 +770,9 @@ class Conque:
         self.read(1)
 
         # reset timer
-        if self.c == 1:
+        if not reset_timer:
+            pass
+        elif self.c == 1:
             vim.command('call feedkeys("\<right>\<left>", "n")')
         else:
             vim.command('call feedkeys("\<left>\<right>", "n")')
@@ -395,11 +781,6 @@ class Conque:
         if self.cursor_set:
             return
 
-        # check if window size has changed
-        if not CONQUE_FAST_MODE:
-            self.update_window_size()
-            logging.info('window size!')
-
         # otherwise set cursor position
         try:
             self.set_cursor(self.l, self.c)
@@ -518,7 +899,7 @@ class Conque:
                 logging.debug('checking syn ' + str(syn))
                 if syn['start'] >= start and syn['start'] < end:
                     logging.debug('first')
-                    vim.command('syn clear ' + syn['name'])
+                    self.syntax_command('syn clear ' + syn['name'])
                     to_del.append(i)
                     # outside
                     if syn['end'] > end:
@@ -526,7 +907,7 @@ class Conque:
                         self.exec_highlight(buffer_line, end, syn['end'], syn['highlight'])
                 elif syn['end'] > start and syn['end'] <= end:
                     logging.debug('second')
-                    vim.command('syn clear ' + syn['name'])
+                    self.syntax_command('syn clear ' + syn['name'])
                     to_del.append(i)
                     # outside
                     if syn['start'] < start:
@@ -556,22 +937,14 @@ class Conque:
         """ Execute the Vim commands for a single syntax highlight """
 
         syntax_name = 'ConqueHighLightAt_%d_%d_%d_%d' % (self.proc.pid, self.l, start, len(self.color_history) + 1)
-        syntax_options = 'contains=ALLBUT,ConqueString,MySQLString,MySQLKeyword oneline'
-        syntax_region = 'syntax match %s /\%%%dl\%%>%dc.\{%d}\%%<%dc/ %s' % (syntax_name, buffer_line, start - 1, end - start, end + 1, syntax_options)
-
-        # check for cached highlight group
-        hgroup = 'ConqueHL_%d' % (abs(hash(highlight)))
-        if hgroup not in self.highlight_groups:
-            syntax_group = 'highlight %s %s' % (hgroup, highlight)
-            self.highlight_groups[hgroup] = hgroup
-            vim.command(syntax_group)
+        syntax_region = self.syntax_match(syntax_name, buffer_line, start, end)
 
         # link this syntax match to existing highlight group
-        syntax_highlight = 'highlight link %s %s' % (syntax_name, self.highlight_groups[hgroup])
+        syntax_highlight = 'highlight link %s %s' % (syntax_name, self.highlight_group(highlight))
 
         logging.debug(syntax_region)
 
-        vim.command(syntax_region)
+        self.syntax_command(syntax_region)
         vim.command(syntax_highlight)
 
         # add syntax name to history
@@ -581,6 +954,156 @@ class Conque:
         self.color_history[buffer_line].append({'name': syntax_name, 'start': start, 'end': end, 'highlight': highlight})
 
 
+    def highlight_group(self, highlight):
+        """ Return the highlight group for color attributes, defining it the first time """
+
+        # check for cached highlight group
+        hgroup = 'ConqueHL_%d' % (abs(hash(highlight)))
+        if hgroup not in self.highlight_groups:
+            syntax_group = 'highlight %s %s' % (hgroup, highlight)
+            self.highlight_groups[hgroup] = hgroup
+            vim.command(syntax_group)
+
+        return self.highlight_groups[hgroup]
+
+    def syntax_match(self, syntax_name, buffer_line, start, end):
+        """ Return the syntax command which colors a range of characters in a buffer line """
+
+        syntax_options = 'contains=ALLBUT,ConqueString,MySQLString,MySQLKeyword oneline'
+        return 'syntax match %s /\%%%dl\%%>%dc.\{%d}\%%<%dc/ %s' % (syntax_name, buffer_line, start - 1, end - start, end + 1, syntax_options)
+
+    def trim_scrollback(self):
+        """ Delete the oldest lines once the buffer is well past the scrollback limit.
+
+        Lines are deleted in batches of a tenth of the limit, since every trim moves
+        all line numbers and the colors of the remaining lines have to be redone.
+
+        """
+        if not self.scrollback:
+            return
+
+        excess = self.screen.get_top() - 1 - self.scrollback - self.history_loaded
+        if excess < max(CONQUE_MIN_SCROLLBACK_TRIM, self.scrollback // 10):
+            return
+
+        self.drop_lines(excess)
+
+    def drop_lines(self, count):
+        """ Delete count lines from the top of the buffer, keeping them in the history if there is one """
+
+        lines = self.screen.trim(count)
+        self.trimmed_lines += count
+
+        if self.history:
+            self.history.add(lines)
+
+        self.shift_lines(-count)
+
+    def get_memory(self):
+        """ Return the approximate bytes of memory held by this terminal, by what holds them.
+
+        Highlight groups are shared by all terminals, and not counted.
+
+        """
+
+        syntax_count = 0
+        for line in self.color_history.keys():
+            syntax_count += len(self.color_history[line])
+
+        pending = 0
+        for chunk in (self.pending_output or []) + self.pending_syntax:
+            pending += len(chunk)
+        if self.history:
+            for line in self.history.pending:
+                pending += len(line) + 1
+
+        return {
+            'buffer': self.screen.get_bytes(),
+            'colors': syntax_count * CONQUE_SYNTAX_BYTES,
+            'pending': pending
+        }
+
+    def enforce_memory(self):
+        """ Keep the memory held by this terminal under memory_limit.
+
+        Colors above the screen go first, then the oldest lines, to the history
+        file if there is one. The screen itself and unparsed output are never dropped.
+
+        """
+        usage = self.get_memory()
+        over = sum(usage.values()) - self.memory_limit
+        if over <= 0:
+            return
+
+        logging.info('memory limit exceeded ' + str(usage))
+        self.memory_trims += 1
+
+        top = self.screen.get_top()
+
+        # colors of the scrollback
+        for line in list(self.color_history.keys()):
+            if line < top:
+                for syn in self.color_history[line]:
+                    self.syntax_command('syn clear ' + syn['name'])
+                    over -= CONQUE_SYNTAX_BYTES
+                del self.color_history[line]
+
+        # drop the oldest lines, going by the average line size
+        if over > 0 and top > 1:
+            line_bytes = max(1, usage['buffer'] // len(self.screen))
+            count = min(top - 1, over // line_bytes + 1)
+            self.history_loaded = max(0, self.history_loaded - count)
+            self.drop_lines(count)
+
+    def load_history(self, count=0):
+        """ Page lines deleted by trim_scrollback() back into the top of the buffer.
+
+        They stay until the next time insert mode is entered, then the scrollback
+        limit applies again. Returns the number of lines loaded.
+
+        """
+        if not self.history or not self.history.lines:
+            return 0
+
+        if count <= 0:
+            count = CONQUE_HISTORY_BLOCK_LINES
+
+        lines = self.history.pop(count)
+        self.screen.prepend(lines)
+        self.history_loaded += len(lines)
+        self.trimmed_lines -= len(lines)
+        self.shift_lines(len(lines))
+
+        # stay on the same text
+        if self.screen.is_current():
+            try:
+                (row, col) = vim.current.window.cursor
+                vim.current.window.cursor = (row + len(lines), col)
+            except:
+                pass
+
+        return len(lines)
+
+    def shift_lines(self, offset):
+        """ Renumber everything which refers to buffer lines, after lines were added or removed at the top """
+
+        # syntax matches have their line numbers built in
+        history = {}
+        for buffer_line in self.color_history.keys():
+            for syn in self.color_history[buffer_line]:
+                self.syntax_command('syn clear ' + syn['name'])
+                if buffer_line + offset > 0:
+                    self.syntax_command(self.syntax_match(syn['name'], buffer_line + offset, syn['start'], syn['end']))
+            if buffer_line + offset > 0:
+                history[buffer_line + offset] = self.color_history[buffer_line]
+        self.color_history = history
+
+        # move the predicted echo along
+        if self.prediction:
+            self.prediction['top'] += offset
+            if self.prediction['drawn'] and self.screen.is_current():
+                self.draw_prediction()
+
     def prune_colors(self):
         """ Remove old syntax highlighting from the Vim buffer
 
@@ -597,7 +1120,7 @@ class Conque:
         for line in ks:
             if line < buffer_line - CONQUE_MAX_SYNTAX_LINES:
                 for syn in self.color_history[line]:
-                    vim.command('syn clear ' + syn['name'])
+                    self.syntax_command('syn clear ' + syn['name'])
                 del self.color_history[line]
 
 
@@ -639,7 +1162,7 @@ class Conque:
 
     def ctl_bel(self):
         """ Process the bell control character. """
-        vim.command('call conque_term#bell()')
+        self.pending_bell = True
 
     def ctl_tab(self):
         """ Process the tab control character. """
@@ -739,7 +1262,7 @@ class Conque:
             buffer_line = self.get_buffer_line(self.l)
             if buffer_line in self.color_history:
                 for syn in self.color_history[buffer_line]:
-                    vim.command('syn clear ' + syn['name'])
+                    self.syntax_command('syn clear ' + syn['name'])
 
         logging.debug(str(self.color_changes))
         logging.debug('new line: ' + self.screen[self.l])
@@ -829,7 +1352,7 @@ class Conque:
             for line in self.color_history.keys():
                 if line >= buffer_line:
                     for syn in self.color_history[line]:
-                        vim.command('syn clear ' + syn['name'])
+                        self.syntax_command('syn clear ' + syn['name'])
 
         self.color_changes = {}
 
@@ -867,7 +1390,7 @@ class Conque:
             new_end = csi['vals'][1]
         else:
             new_start = 1
-            new_end = vim.current.window.height
+            new_end = self.lines
 
         self.top = new_start
         self.bottom = new_end
@@ -910,6 +1433,10 @@ class Conque:
         elif csi['val'] == 7:
             self.autowrap = True
 
+        # bracketed paste mode
+        elif csi['val'] == 2004 and csi['flag'] == '?':
+            self.bracketed_paste = True
+
 
         self.color_changes = {}
 
@@ -928,6 +1455,10 @@ class Conque:
         elif csi['val'] == 7:
             self.autowrap = False
 
+        # bracketed paste mode
+        elif csi['val'] == 2004 and csi['flag'] == '?':
+            self.bracketed_paste = False
+
 
         self.color_changes = {}
 
@@ -1007,13 +1538,306 @@ class Conque:
         """ Change the Vim window title. """
         logging.debug(key)
         logging.debug(val)
+
+        # applied by apply_effects(), programs often set the title at every prompt
         if key == '0' or key == '2':
-            logging.debug('setting title to ' + re.escape(val))
-            vim.command('setlocal statusline=' + re.escape(val))
-            try:
-                vim.command('set titlestring=' + re.escape(val))
-            except:
-                pass
+            self.pending_title = val
+
+    def apply_effects(self, set_cursor=True):
+        """ Apply the state changes recorded while parsing a read's output.
+
+        The title is only set if it changed, and only while the buffer is in the
+        current window since statusline is local to the window. Bells are shown at
+        most once every CONQUE_BELL_INTERVAL seconds.
+
+        """
+        if self.pending_bell:
+            self.pending_bell = False
+            now = time.time()
+            if now - self.last_bell >= CONQUE_BELL_INTERVAL:
+                self.last_bell = now
+                vim.command('call conque_term#bell()')
+
+        if not self.screen.is_current():
+            self.screen.apply_align()
+            self.cursor_set = False
+            return
+
+        if self.pending_title is not None:
+            val = self.pending_title
+            self.pending_title = None
+            if val != self.title:
+                self.title = val
+                logging.debug('setting title to ' + re.escape(val))
+                vim.command('setlocal statusline=' + re.escape(val))
+                try:
+                    vim.command('set titlestring=' + re.escape(val))
+                except:
+                    pass
+
+        if not set_cursor:
+            self.cursor_set = False
+            return
+
+        # window size changes arrive through conque_term#resize_event()
+        self.screen.set_cursor(self.l, self.c)
+        self.cursor_set = True
+
+    def get_stats(self):
+        """ Return a dictionary of performance counters for this terminal. """
+        stats = {'pooled': int(self.pooled)}
+
+        if hasattr(self.proc, 'get_input_stats'):
+            stats.update(self.proc.get_input_stats())
+
+        if getattr(self.proc, 'log', None):
+            stats.update(self.proc.log.get_stats())
+
+        # parsing time
+        if self.read_histogram is not None:
+            stats['read_histogram'] = self.read_histogram
+            stats['deferred_reads'] = self.deferred_reads
+            stats['bytes_parsed'] = self.bytes_parsed
+            stats['parse_time'] = int(self.parse_time)
+
+        if self.scrollback:
+            stats['trimmed_lines'] = self.trimmed_lines
+
+        if self.history:
+            stats['history_lines'] = self.history.lines
+            stats['history_bytes'] = self.history.get_size()
+
+        # approximate memory use
+        if self.memory_limit:
+            stats['memory'] = sum(self.get_memory().values())
+            stats['memory_trims'] = self.memory_trims
+
+        # predicted echo
+        if self.predict_echo:
+            stats['predict_hits'] = self.predict_hits
+            stats['predict_misses'] = self.predict_misses
+
+        # typing latency
+        if self.echo_max:
+            stats['echo_wait'] = self.echo_wait()
+            stats['echo_delay'] = int(self.echo_delay or 0)
+            stats['echo_timeouts'] = self.echo_timeouts
+            stats['echo_histogram'] = self.echo_histogram
+
+        # compared to polling every 50ms
+        if self.poll_start:
+            stats['poll_interval'] = self.poll_interval
+            stats['polls'] = self.poll_count
+            stats['polls_saved'] = max(0, int((time.time() - self.poll_start) * 20) - self.poll_count)
+
+        return stats
+
+    def predict_input(self, text):
+        """ Draw typed characters at the cursor before the program echoes them.
+
+        Predictions are highlighted with ConquePrediction and taken back before the
+        next output is parsed, see check_prediction(). Only plain ASCII is predicted,
+        and nothing while the terminal reads a password with echo off. A control key
+        freezes the current prediction since the cursor could go anywhere.
+
+        """
+        if self.pending_output or not self.screen.is_current():
+            return
+
+        p = self.prediction
+
+        if not CONQUE_PREDICTABLE.match(text):
+            if p:
+                p['frozen'] = True
+            return
+
+        if p and p['frozen']:
+            return
+
+        if p is None:
+            # the echo is quick enough already
+            if self.echo_delay is not None and self.echo_delay < CONQUE_PREDICT_MIN_DELAY:
+                return
+
+            # canonical mode without echo, e.g. a password prompt
+            mode = self.proc.echo_mode()
+            if mode is None or (mode[0] and not mode[1]):
+                return
+
+            p = {'text': u(''), 'line': self.l, 'col': self.c, 'top': self.screen.screen_top, 'saved': self.screen[self.l], 'time': time.time(), 'drawn': not self.predict_suspended, 'frozen': False}
+            self.prediction = p
+
+        # don't guess where wrapped text goes
+        if p['col'] + len(p['text']) + len(text) > self.working_columns:
+            p['frozen'] = True
+            return
+
+        p['text'] = p['text'] + text
+
+        if p['drawn']:
+            self.draw_prediction()
+
+    def draw_prediction(self):
+        """ Write the predicted characters into the buffer and move the cursor past them. """
+
+        p = self.prediction
+        col = p['col']
+        end = col + len(p['text'])
+
+        line = p['saved']
+        if len(line) < col - 1:
+            line = line + ' ' * (col - 1 - len(line))
+
+        self.screen[p['line']] = line[:col - 1] + p['text'] + line[end - 1:]
+
+        buffer_line = p['top'] + p['line'] - 1
+        vim.command('syn clear ConquePrediction')
+        vim.command('syntax match ConquePrediction /\%%%dl\%%>%dc.\{%d}\%%<%dc/ oneline' % (buffer_line, col - 1, end - col, end + 1))
+
+        self.screen.set_cursor(p['line'], end)
+
+    def take_prediction(self):
+        """ Remove the predicted characters from the buffer, returning the prediction. """
+
+        p = self.prediction
+        if p is None:
+            return None
+
+        self.prediction = None
+
+        if p['drawn'] and self.screen.screen_top == p['top']:
+            self.screen[p['line']] = p['saved']
+            self.syntax_command('syn clear ConquePrediction')
+
+        return p
+
+    def check_prediction(self, p):
+        """ Compare a prediction with the output which was just parsed.
+
+        Characters found where they were predicted are confirmed. If the cursor is
+        still waiting after the last confirmed one the rest is drawn again, otherwise
+        the guess was wrong and predictions stop until an echo matches again.
+
+        """
+        line = p['line'] - (self.screen.screen_top - p['top'])
+        col = p['col']
+        text = p['text']
+
+        echoed = 0
+        if line >= 1:
+            current = self.screen[line]
+            while echoed < len(text) and current[col - 1 + echoed:col + echoed] == text[echoed]:
+                echoed += 1
+
+        if p['drawn']:
+            self.predict_hits += echoed
+
+            # read_echo() doesn't wait while predicting, learn the delay here
+            if echoed and self.output_time:
+                self.learn_echo_delay((self.output_time - p['time']) * 1000)
+
+        # echo is working again
+        if echoed and not p['drawn']:
+            self.predict_suspended = False
+
+        if echoed == len(text):
+            return
+
+        # still waiting for the rest
+        if self.l == line and self.c == col + echoed and self.screen.is_current():
+            self.prediction = {'text': text[echoed:], 'line': self.l, 'col': self.c, 'top': self.screen.screen_top, 'saved': self.screen[self.l], 'time': p['time'], 'drawn': p['drawn'] and not self.predict_suspended, 'frozen': p['frozen']}
+            if self.prediction['drawn']:
+                self.draw_prediction()
+            return
+
+        # after a control key the screen was never predictable
+        if p['frozen']:
+            return
+
+        if p['drawn']:
+            self.predict_misses += 1
+        self.predict_suspended = True
+
+    def expire_prediction(self):
+        """ Take back a prediction whose echo never arrived, e.g. input with echo turned off. """
+
+        p = self.prediction
+        if p is None or time.time() - p['time'] < CONQUE_PREDICT_TIMEOUT:
+            return
+
+        self.take_prediction()
+        self.screen.set_cursor(self.l, self.c)
+
+        if p['drawn'] and not p['frozen']:
+            self.predict_misses += 1
+            self.predict_suspended = True
+
+    def count_time(self, histogram, elapsed):
+        """ Add a duration in milliseconds to a histogram with CONQUE_READ_HISTOGRAM buckets """
+
+        bucket = 0
+        while bucket < len(CONQUE_READ_HISTOGRAM) and elapsed >= CONQUE_READ_HISTOGRAM[bucket]:
+            bucket += 1
+        histogram[bucket] += 1
+
+    def start_log(self, path, log_input=False, compress=False):
+        """ Write a transcript of raw subprocess output, and optionally input, to a file. """
+        return self.proc.start_log(path, log_input, compress)
+
+    def stop_log(self):
+        """ Stop writing the session transcript. """
+        self.proc.stop_log()
+
+    def init_polling(self, options):
+        """ Set the poll interval range and start polling at the fastest rate. """
+        self.poll_min = max(1, int(options['poll_min']))
+        self.poll_max = max(self.poll_min, int(options['poll_max']))
+        self.poll_interval = self.poll_min
+        self.poll_next = 0
+        self.poll_count = 0
+        self.poll_start = time.time()
+
+    def poll_update(self, had_output):
+        """ Adapt the poll interval after checking for output.
+
+        Polls which find output go back to the fastest rate. A poll which was due
+        and found nothing doubles the interval, up to poll_max. Extra checks made
+        before the terminal was due, e.g. after a key press, don't count.
+
+        """
+        now = time.time()
+
+        # timers may fire a little early
+        if had_output:
+            self.poll_interval = self.poll_min
+        elif now + 0.001 >= self.poll_next:
+            self.poll_interval = min(self.poll_max, self.poll_interval * 2)
+        else:
+            return
+
+        self.poll_count += 1
+        self.poll_next = now + float(self.poll_interval) / 1000
+
+    def poll_reset(self):
+        """ Go back to fast polling, e.g. after a key press or window change. """
+        self.poll_interval = self.poll_min
+        self.poll_next = time.time() + float(self.poll_min) / 1000
+
+        # bring a distant timer forward
+        if ConqueTerm_Poller.timer_due > time.time() + float(self.poll_min) / 1000:
+            vim.command('call conque_term#schedule()')
+
+    def has_exited(self):
+        """ Check if the subprocess has exited. """
+        return self.proc.exited
+
+    def get_exit_status(self):
+        """ Exit code of the subprocess, negative signal number if killed, or None if unknown. """
+        return self.proc.exit_status
+
+    def set_encoding(self, encoding):
+        """ Change the character encoding used to talk to the subprocess. """
+        self.proc.set_encoding(encoding)
 
     def update_window_size(self, force=False):
         """ Check and save the current buffer dimensions.
@@ -1023,6 +1847,10 @@ class Conque:
         subprocess pty.
 
         """
+        # there is no window to measure
+        if self.screen.hidden:
+            return
+
         # resize if needed
         if force or vim.current.window.width != self.columns or vim.current.window.height != self.lines:
 
@@ -1044,12 +1872,21 @@ class Conque:
             # signal process that screen size has changed
             self.proc.window_resize(self.lines, self.columns)
 
+            # conque_term#resize_all() skips windows which are still this size
+            vim.command('let b:ConqueTerm_WindowSize = [%d, %d]' % (self.lines, self.columns))
+
+            # the program will probably redraw
+            self.poll_reset()
+
     def insert_enter(self):
         """ Run commands when user enters insert mode. """
 
         # check window size
         self.update_window_size()
 
+        # back to the terminal, the scrollback limit applies again
+        self.history_loaded = 0
+
         # we need to set the cursor position
         self.cursor_set = False
 
@@ -1067,16 +1904,98 @@ class Conque:
 
     def resume(self):
         """ Called when this terminal is no longer idle. """
-        pass
-        pass
+
+        # the buffer may have been edited meanwhile
+        self.screen.resync()
+        self.flush_syntax()
+
+    def hide(self):
+        """ Called when the terminal buffer is no longer shown in any window. """
+        self.screen.hide()
+
+    def show(self):
+        """ Called when the terminal buffer is shown in a window again. """
+        self.screen.show()
+        self.flush_syntax()
+
+        # output received while hidden has moved the screen
+        if self.screen.is_current():
+            self.update_window_size()
+            self.screen.align()
+        self.cursor_set = False
+
+    def syntax_command(self, command):
+        """ Run a buffer local syntax command now, or once the terminal buffer is current. """
+
+        if self.screen.is_current():
+            vim.command(command)
+            return
+
+        if self.syntax_overflow:
+            return
+
+        self.pending_syntax.append(command)
+
+        # don't hoard colors for a terminal nobody is looking at. The commands depend on
+        # each other, so none can be left out, they're replaced by a full redo instead
+        if len(self.pending_syntax) > CONQUE_MAX_PENDING_SYNTAX:
+            self.pending_syntax = []
+            self.syntax_overflow = True
+
+    def flush_syntax(self):
+        """ Run syntax commands and title changes queued while this buffer wasn't current. """
+
+        if not self.screen.is_current():
+            return
+
+        commands = self.pending_syntax
+        self.pending_syntax = []
+        for command in commands:
+            try:
+                vim.command(command)
+            except:
+                pass
+
+        if self.syntax_overflow:
+            self.syntax_overflow = False
+            self.redo_colors()
+
+        # the title may have been set in another window meanwhile
+        if self.pending_title is None:
+            self.pending_title = self.title
+        self.title = None
+        self.apply_effects(False)
+
+    def redo_colors(self):
+        """ Clear all syntax highlighting in the current buffer and apply color_history again """
+
+        try:
+            # reloads the syntax file too
+            vim.command('syntax clear')
+            vim.command('exe "setlocal syntax=" . &l:syntax')
+        except:
+            logging.info(traceback.format_exc())
+
+        for buffer_line in self.color_history.keys():
+            for syn in self.color_history[buffer_line]:
+                vim.command(self.syntax_match(syn['name'], buffer_line, syn['start'], syn['end']))
+                vim.command('highlight link %s %s' % (syn['name'], self.highlight_group(syn['highlight'])))
 
     def close(self):
         """ End the process running in the terminal. """
         self.proc.close()
+        self.close_history()
 
     def abort(self):
-        """ Forcefully end the process running in the terminal. """
-        self.proc.signal(1)
+        """ Forcefully end the process running in the terminal, and any jobs it started. """
+        self.proc.close()
+        self.close_history()
+
+    def close_history(self):
+        """ Delete the scrollback history file. """
+        if self.history:
+            self.history.close()
+            self.history = None
 
 
 
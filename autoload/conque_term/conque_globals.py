@@ -48,6 +48,13 @@ try:
 except:
     CONQUE_VIM_ENCODING = 'utf-8'
 
+# Vim version, e.g. 704 for 7.4
+try:
+    CONQUE_VIM_VERSION = int(vim.eval('v:version'))
+
+except:
+    CONQUE_VIM_VERSION = 700
+
 
 def u(str_val, str_encoding='utf-8', errors='strict'):
     """ Foolhardy attempt to make unicode string syntax compatible with both python 2 and 3. """
@@ -307,6 +314,52 @@ CONQUE_SOLE_MEM_REDRAW = 1000
 # ignored if g:ConqueTerm_Color = 2
 CONQUE_MAX_SYNTAX_LINES = 200
 
+# codecs without shift states, which can pass ASCII through undecoded. Prefixes of codec names
+CONQUE_STATELESS_CODECS = ('utf-8', 'ascii', 'iso8859-', 'cp', 'mac-', 'koi8-', 'tis-620', 'euc', 'shift_jis', 'gb2312', 'gbk', 'gb18030', 'big5', 'johab')
+
+# markers around text sent as a bracketed paste
+CONQUE_PASTE_START = u('\x1b[200~')
+CONQUE_PASTE_END = u('\x1b[201~')
+
+# maximum syntax commands to queue for a terminal buffer which isn't current
+CONQUE_MAX_PENDING_SYNTAX = 20000
+
+# weight of the newest sample in the smoothed echo delay
+CONQUE_ECHO_WEIGHT = 0.25
+
+# key presses in a row without an echo before waiting for it stops
+CONQUE_ECHO_MAX_MISSES = 3
+
+# input which can be drawn before the program echoes it
+CONQUE_PREDICTABLE = re.compile("^[\x20-\x7e]+$")
+
+# only predict echo when it usually takes longer than this many milliseconds
+CONQUE_PREDICT_MIN_DELAY = 10
+
+# seconds to wait for predicted characters to be echoed
+CONQUE_PREDICT_TIMEOUT = 1.0
+
+# fewest lines deleted at once to keep the scrollback limit
+CONQUE_MIN_SCROLLBACK_TRIM = 100
+
+# lines per compressed block of scrollback history, and the default page size
+CONQUE_HISTORY_BLOCK_LINES = 1000
+
+# output characters parsed between checks of a terminal's memory use
+CONQUE_MEMORY_CHECK_BYTES = 65536
+
+# rough memory held by one syntax match, Python and Vim side together
+CONQUE_SYNTAX_BYTES = 300
+
+# minimum seconds between bell notifications
+CONQUE_BELL_INTERVAL = 1.0
+
+# stop reading from a subprocess while this many output chunks wait to be parsed
+CONQUE_MAX_PENDING_OUTPUT = 50000
+
+# upper bounds in milliseconds of the read() time histogram buckets
+CONQUE_READ_HISTOGRAM = [1, 2, 4, 8, 16, 32, 64]
+
 # windows input splitting on special keys
 CONQUE_WIN32_REGEX_VK = re.compile("(\x1b\[[0-9;]+VK)")
 
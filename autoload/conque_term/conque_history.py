@@ -0,0 +1,170 @@
+# FILE:     autoload/conque_term/conque_history.py
+# AUTHOR:   Nico Raffo <nicoraffo@gmail.com>
+# WEBSITE:  http://conque.googlecode.com
+# MODIFIED: __MODIFIED__
+# VERSION:  __VERSION__, for Vim 7.0
+# LICENSE:
+# Conque - Vim terminal/console emulator
+# Copyright (C) 2009-__YEAR__ Nico Raffo
+#
+# MIT License
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in
+# all copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN
+# THE SOFTWARE.
+
+"""
+ConqueHistory
+
+Keep lines deleted from the top of a terminal buffer in a compressed file, so
+the scrollback limit doesn't lose them for good.
+
+Lines are collected in memory and written out in blocks of
+CONQUE_HISTORY_BLOCK_LINES, each one compressed with zlib on its own. The
+offset, size and line count of every block are kept in an index, so any line
+can be found by decompressing a single block. Lines can be taken back off the
+end, newest first, when they are paged back into the buffer.
+
+Usage:
+
+    history = ConqueHistory()
+    history.add(['oldest line', 'next line'])
+    history.pop(1)
+    history.close()
+"""
+
+import os
+import tempfile
+import zlib
+
+
+class ConqueHistory:
+
+    # file holding the compressed blocks
+    file = None
+    path = None
+
+    # (offset, size, line count) of each block in the file
+    index = None
+
+    # lines not written to a block yet
+    pending = None
+
+    # total number of lines
+    lines = 0
+
+
+    def __init__(self):
+        """ Create the history file, it's deleted again by close() """
+
+        fd, self.path = tempfile.mkstemp(prefix='conque_history_')
+        self.file = os.fdopen(fd, 'w+b')
+        self.index = []
+        self.pending = []
+        self.lines = 0
+
+
+    def add(self, lines):
+        """ Append unicode lines, the oldest first """
+
+        self.pending.extend(lines)
+        self.lines += len(lines)
+
+        while len(self.pending) >= CONQUE_HISTORY_BLOCK_LINES:
+            self.write_block(self.pending[:CONQUE_HISTORY_BLOCK_LINES])
+            self.pending = self.pending[CONQUE_HISTORY_BLOCK_LINES:]
+
+
+    def pop(self, count):
+        """ Remove and return up to count of the newest lines, oldest first """
+
+        count = min(count, self.lines)
+        lines = []
+
+        while len(lines) < count:
+
+            # reopen the last block
+            if not self.pending:
+                self.pending = self.read_block(len(self.index) - 1)
+                offset = self.index.pop()[0]
+                self.file.seek(offset)
+                self.file.truncate()
+
+            take = min(count - len(lines), len(self.pending))
+            lines = self.pending[-take:] + lines
+            self.pending = self.pending[:-take]
+
+        self.lines -= count
+        return lines
+
+
+    def get(self, start, end):
+        """ Return lines start to end, counting from zero for the oldest """
+
+        lines = []
+        first = 0
+
+        for i in range(len(self.index)):
+            count = self.index[i][2]
+            if first + count > start and first < end:
+                block = self.read_block(i)
+                lines.extend(block[max(0, start - first):end - first])
+            first += count
+
+        if end > first:
+            lines.extend(self.pending[max(0, start - first):end - first])
+
+        return lines
+
+
+    def write_block(self, lines):
+        """ Compress lines and add them to the end of the file """
+
+        data = zlib.compress(u('\n').join(lines).encode('utf-8'))
+
+        self.file.seek(0, 2)
+        offset = self.file.tell()
+        self.file.write(data)
+        self.file.flush()
+
+        self.index.append((offset, len(data), len(lines)))
+
+
+    def read_block(self, i):
+        """ Return the lines of a block """
+
+        offset, size, count = self.index[i]
+        self.file.seek(offset)
+
+        return zlib.decompress(self.file.read(size)).decode('utf-8').split(u('\n'))
+
+
+    def get_size(self):
+        """ Bytes used on disk """
+
+        return sum([block[1] for block in self.index])
+
+
+    def close(self):
+        """ Delete the history file """
+
+        try:
+            self.file.close()
+            os.remove(self.path)
+        except:
+            pass
+
@@ -0,0 +1,303 @@
+# FILE:     autoload/conque_term/conque_log.py
+# AUTHOR:   Nico Raffo <nicoraffo@gmail.com>
+# WEBSITE:  http://conque.googlecode.com
+# MODIFIED: __MODIFIED__
+# VERSION:  __VERSION__, for Vim 7.0
+# LICENSE:
+# Conque - Vim terminal/console emulator
+# Copyright (C) 2009-__YEAR__ Nico Raffo
+#
+# MIT License
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in
+# all copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN
+# THE SOFTWARE.
+
+"""
+ConqueLogWriter
+
+Write a transcript of a terminal session to a file from a background thread.
+
+The subprocess hands over raw pty data exactly as it was read or written,
+before any decoding or escape sequence parsing. Handing data over only
+appends it to a list, so a slow disk never holds up reading the terminal.
+The thread writes whatever has accumulated in one batch.
+
+Output-only logs contain the raw output stream, and can be replayed with
+cat, just like a typescript from script(1). Logs which also record input
+are made of frames, so the two directions can be told apart:
+
+    1 byte      'o' for output, 'i' for input, 'g' for a gap
+    8 bytes     milliseconds since the epoch, big-endian
+    4 bytes     length of the data, big-endian
+    n bytes     data
+
+Data is never left out silently. If the disk falls too far behind, or a
+write fails, a gap record takes the place of the missing data: a 'g' frame
+holding the number of bytes missing as 8 bytes big-endian, or in output-only
+logs a terminal reset followed by a line saying how much is missing, so a
+replay doesn't carry on from the wrong screen.
+
+Logs can be gzip compressed, and are then readable with zcat or Python's
+gzip module.
+
+Usage:
+
+    log = ConqueLogWriter('/tmp/session.log', log_input=True)
+    log.start()
+    log.output(data)
+    log.input(data)
+    log.stop()
+"""
+
+import gzip
+import struct
+import time
+import threading
+
+
+class ConqueLogWriter:
+
+    # log file name
+    path = None
+
+    # record input as well as output, using the framed format
+    log_input = False
+
+    # gzip compress the file
+    compress = False
+
+    # data waiting to be written, and its total length
+    chunks = None
+    size = 0
+
+    # pending data is dropped beyond this, rather than use unbounded memory
+    max_size = 16777216
+
+    # bytes dropped since the last batch was taken, recorded by a gap record
+    gap = 0
+
+    # guards chunks, size, gap and the statistics, signalled when data arrives
+    cond = None
+
+    # statistics
+    bytes_logged = 0
+    bytes_dropped = 0
+
+    # background thread
+    thread = None
+    running = False
+
+    # seconds to wait for more data before writing a batch
+    interval = 0.2
+
+
+    def __init__(self, path, log_input=False, compress=False):
+        """ Initialize writer for a log file """
+
+        self.path = path
+        self.log_input = log_input
+        self.compress = compress
+        self.chunks = []
+        self.size = 0
+        self.gap = 0
+        self.cond = threading.Condition()
+
+
+    def start(self):
+        """ Open the log file and start the background thread. Returns False if the file can't be opened. """
+
+        try:
+            if self.compress:
+                self.file = gzip.open(self.path, 'ab')
+            else:
+                self.file = open(self.path, 'ab')
+        except:
+            logging.info(traceback.format_exc())
+            return False
+
+        self.running = True
+        self.thread = threading.Thread(target=self.run)
+        self.thread.daemon = True
+        self.thread.start()
+
+        return True
+
+
+    def output(self, data):
+        """ Queue raw output read from the subprocess """
+
+        if self.log_input:
+            self.append(self.frame('o', data))
+        else:
+            self.append(data)
+
+
+    def input(self, data):
+        """ Queue raw input written to the subprocess """
+
+        if self.log_input:
+            self.append(self.frame('i', data))
+
+
+    def frame(self, direction, data):
+        """ Prefix data with a frame header """
+
+        return struct.pack('>cQI', direction.encode('ascii'), int(time.time() * 1000), len(data)) + data
+
+
+    def gap_record(self, count):
+        """ Return the record which stands in for count bytes of missing data """
+
+        if self.log_input:
+            return self.frame('g', struct.pack('>Q', count))
+
+        return ('\x1bc\r\n[%d bytes missing from this log]\r\n' % count).encode('ascii')
+
+
+    def append(self, data):
+        """ Hand data over to the writer thread """
+
+        if not data or not self.running:
+            return
+
+        self.cond.acquire()
+        try:
+            # once something is dropped, drop the rest of this batch too, so the gap is in one place
+            if self.gap or self.size + len(data) > self.max_size:
+                self.gap += len(data)
+                self.bytes_dropped += len(data)
+                return
+
+            self.chunks.append(data)
+            self.size += len(data)
+
+            # wake up right away for big batches
+            if self.size >= 65536:
+                self.cond.notify()
+        finally:
+            self.cond.release()
+
+
+    def run(self):
+        """ Write batches until stop() is called and everything is written """
+
+        # bytes missing before the next batch, because writing them failed
+        lost = 0
+
+        while True:
+            self.cond.acquire()
+            try:
+                if self.running and self.size < 65536:
+                    self.cond.wait(self.interval)
+
+                chunks = self.chunks
+                size = self.size
+                gap = self.gap
+                self.chunks = []
+                self.size = 0
+                self.gap = 0
+                running = self.running
+            finally:
+                self.cond.release()
+
+            if chunks or gap or (lost and not running):
+                batch = chunks[:]
+                if lost:
+                    batch.insert(0, self.gap_record(lost))
+                if gap:
+                    batch.append(self.gap_record(gap))
+                data = batch[0][:0].join(batch)
+
+                written = self.write(data)
+
+                self.cond.acquire()
+                try:
+                    if written:
+                        self.bytes_logged += len(data)
+                    else:
+                        self.bytes_dropped += size
+                finally:
+                    self.cond.release()
+
+                # all missing in one piece now
+                if written:
+                    lost = 0
+                else:
+                    lost += size + gap
+
+            if not running:
+                break
+
+        try:
+            self.file.close()
+        except:
+            pass
+
+
+    def write(self, data):
+        """ Write a batch to the file. On failure, take back anything partly written if possible. """
+
+        position = None
+        try:
+            if not self.compress:
+                position = self.file.tell()
+            self.file.write(data)
+            self.file.flush()
+            return True
+        except:
+            logging.info(traceback.format_exc())
+
+        if position is not None:
+            try:
+                self.file.seek(position)
+                self.file.truncate()
+            except:
+                pass
+
+        return False
+
+
+    def get_stats(self):
+        """ Return the number of bytes logged and dropped """
+
+        self.cond.acquire()
+        try:
+            return {'log_bytes': self.bytes_logged, 'log_dropped_bytes': self.bytes_dropped}
+        finally:
+            self.cond.release()
+
+
+    def stop(self):
+        """ Write what is left, close the file and stop the thread """
+
+        self.cond.acquire()
+        try:
+            self.running = False
+            self.cond.notify()
+        finally:
+            self.cond.release()
+
+
+    def wait(self, timeout):
+        """ Wait up to timeout seconds for the thread to finish writing after stop() """
+
+        if self.thread:
+            self.thread.join(timeout)
+
+
+# vim:foldmethod=marker
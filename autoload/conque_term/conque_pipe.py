@@ -0,0 +1,143 @@
+# FILE:     autoload/conque_term/conque_pipe.py
+# AUTHOR:   Nico Raffo <nicoraffo@gmail.com>
+# WEBSITE:  http://conque.googlecode.com
+# MODIFIED: __MODIFIED__
+# VERSION:  __VERSION__, for Vim 7.0
+# LICENSE:
+# Conque - Vim terminal/console emulator
+# Copyright (C) 2009-__YEAR__ Nico Raffo
+#
+# MIT License
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in
+# all copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN
+# THE SOFTWARE.
+
+"""
+ConquePipe
+
+Headless subprocess for conque_term#subprocess(command, {'pipe': 1}).
+
+Exposes the same interface as Conque, so the terminal object API, the
+poller and callbacks work unchanged, but there is no screen and no escape
+sequence parsing. Output is handed back exactly as the program wrote it,
+only decoded from the program's encoding here, each stream with a decoder
+of its own since either may be cut mid-character. stderr is returned along
+with stdout unless it has a callback of its own.
+"""
+
+import vim
+import codecs
+
+
+class ConquePipe(Conque):
+
+    # return stderr output from read() too, until set_stderr_callback() is used
+    merge_stderr = True
+
+    # incremental decoders for stdout and stderr
+    stdout_decoder = None
+    stderr_decoder = None
+
+
+    def open(self):
+        """ Start the program with pipes """
+
+        command = vim.eval('command')
+        options = vim.eval('options')
+
+        self.proc = ConquePipeSubprocess()
+        if self.proc.open(command, {'CONQUE': '1', 'TERM': 'dumb'}, options['encoding']) is False:
+            raise Exception('unable to start ' + command)
+
+        self.set_decoders()
+
+        self.proc.close_timeout = int(options['close_timeout'])
+
+        if options['log_file']:
+            self.start_log(options['log_file'], int(options['log_input']), int(options['log_compress']))
+
+        self.init_polling(options)
+
+
+    def write(self, input, set_cursor=True, read=True):
+        """ Write to the program's stdin.
+
+        Carriage returns become newlines, as a terminal would translate them.
+        Output is left for read() and callbacks to collect.
+
+        """
+        self.proc.write(input.replace(u('\r'), u('\n')))
+        self.poll_reset()
+
+
+    def read(self, timeout=1, set_cursor=True, return_output=False, update_buffer=True):
+        """ Read new output. There is no buffer to update. """
+
+        data = self.proc.read(timeout)
+        output = self.stdout_decoder.decode(data)
+
+        if self.merge_stderr:
+            errors = self.proc.read_stderr()
+            data += errors
+            output = output + self.stderr_decoder.decode(errors)
+
+        self.poll_update(len(data) > 0 or len(self.proc.stderr_chunks) > 0)
+
+        return self.to_vim(output)
+
+
+    def read_stderr(self):
+        """ Return stderr output collected since the last call """
+
+        return self.to_vim(self.stderr_decoder.decode(self.proc.read_stderr()))
+
+
+    def to_vim(self, output):
+        """ Convert decoded output to a string for Vim """
+
+        if CONQUE_PYTHON_VERSION == 3:
+            return output
+        else:
+            return output.encode(CONQUE_VIM_ENCODING, 'replace')
+
+
+    def set_encoding(self, encoding):
+        """ Change the program's character encoding """
+
+        self.proc.set_encoding(encoding)
+        self.set_decoders()
+
+
+    def set_decoders(self):
+        """ Start new decoders for the program's current encoding """
+
+        self.stdout_decoder = codecs.getincrementaldecoder(self.proc.encoding)('replace')
+        self.stderr_decoder = codecs.getincrementaldecoder(self.proc.encoding)('replace')
+
+
+    def auto_read(self, reset_timer=True):
+        """ No buffer to keep up to date """
+        pass
+
+
+    def update_window_size(self, force=False):
+        """ No window """
+        pass
+
+
+# vim:foldmethod=marker
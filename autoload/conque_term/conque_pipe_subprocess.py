@@ -0,0 +1,227 @@
+# FILE:     autoload/conque_term/conque_pipe_subprocess.py
+# AUTHOR:   Nico Raffo <nicoraffo@gmail.com>
+# WEBSITE:  http://conque.googlecode.com
+# MODIFIED: __MODIFIED__
+# VERSION:  __VERSION__, for Vim 7.0
+# LICENSE:
+# Conque - Vim terminal/console emulator
+# Copyright (C) 2009-__YEAR__ Nico Raffo
+#
+# MIT License
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in
+# all copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN
+# THE SOFTWARE.
+
+"""
+ConquePipeSubprocess
+
+Run a program with plain pipes instead of a pty.
+
+Build tools, linters and test runners don't need a terminal. Pipes skip the
+line discipline, can hold far more unread output than a pty, and keep
+stdout and stderr apart. Output is returned as raw bytes, exactly as the
+program wrote it, and decoding is left to the caller. Everything else,
+including input queueing, exit detection, closing and session logs, works
+as in ConqueSubprocess.
+
+Usage:
+
+    p = ConquePipeSubprocess()
+    p.open('make -k', {'CONQUE': '1'})
+    output = p.read(50)
+    errors = p.read_stderr()
+    p.close()
+"""
+
+import os
+import sys
+import select
+import fcntl
+import shlex
+import subprocess
+import threading
+
+
+class ConquePipeSubprocess(ConqueSubprocess):
+
+    # stdout and stderr file descriptors, stdin is self.fd
+    stdout_fd = None
+    stderr_fd = None
+
+    # pipe file descriptors checked for output, used by ConquePoller
+    fds = None
+
+    # stderr output read but not yet returned by read_stderr()
+    stderr_chunks = None
+
+    # requested pipe capacity, Linux only
+    pipe_size = 1048576
+
+    # bytes read per system call
+    read_size = 65536
+
+
+    def open(self, command, env={}, encoding='utf-8'):
+        """ Start the program with stdin, stdout and stderr connected to pipes """
+
+        self.set_encoding(encoding)
+
+        self.reap_lock = threading.Lock()
+
+        child_env = os.environ.copy()
+        child_env.update(env)
+
+        # own session, so close() can signal everything it starts. preexec_fn
+        # isn't safe with the reader and log threads running, only Python 2 needs it
+        if CONQUE_PYTHON_VERSION == 3:
+            session = {'start_new_session': True}
+        else:
+            session = {'preexec_fn': os.setsid}
+
+        try:
+            p = subprocess.Popen(shlex.split(command), stdin=subprocess.PIPE, stdout=subprocess.PIPE, stderr=subprocess.PIPE, bufsize=0, close_fds=True, env=child_env, **session)
+        except:
+            logging.info(traceback.format_exc())
+            return False
+
+        self.pid = p.pid
+
+        # keep the descriptors, the Popen object is no longer needed
+        self.fd = os.dup(p.stdin.fileno())
+        self.stdout_fd = os.dup(p.stdout.fileno())
+        self.stderr_fd = os.dup(p.stderr.fileno())
+        p.stdin.close()
+        p.stdout.close()
+        p.stderr.close()
+
+        self.fds = [self.stdout_fd, self.stderr_fd]
+        self.stderr_chunks = []
+
+        for fd in [self.fd, self.stdout_fd, self.stderr_fd]:
+            fcntl.fcntl(fd, fcntl.F_SETFL, fcntl.fcntl(fd, fcntl.F_GETFL) | os.O_NONBLOCK)
+
+            # F_SETPIPE_SZ
+            if sys.platform.startswith('linux'):
+                try:
+                    fcntl.fcntl(fd, getattr(fcntl, 'F_SETPIPE_SZ', 1031), self.pipe_size)
+                except:
+                    pass
+
+        try:
+            self.pidfd = os.pidfd_open(self.pid)
+        except:
+            self.pidfd = None
+
+        self.input_queue = []
+
+
+    def start_reader(self, max_size=1048576):
+        """ Pipes hold plenty of output already """
+        pass
+
+
+    def read(self, timeout=1):
+        """ Read from both pipes, return new stdout output and keep stderr for read_stderr() """
+
+        output = []
+        read_timeout = float(timeout) / 1000
+
+        while self.fds:
+            watch = self.fds[:]
+            if self.pidfd is not None:
+                watch.append(self.pidfd)
+
+            try:
+                s_read, s_write, s_error = select.select(watch, [], [], read_timeout)
+            except:
+                logging.info(traceback.format_exc())
+                break
+
+            if not s_read:
+                break
+
+            # only wait for the first output
+            read_timeout = 0
+
+            got_output = False
+            for s_fd in s_read:
+                if s_fd == self.pidfd:
+                    self.reap()
+                    continue
+
+                try:
+                    data = os.read(s_fd, self.read_size)
+                except OSError:
+                    data = None
+
+                # end of file
+                if not data:
+                    self.fds.remove(s_fd)
+                    continue
+
+                got_output = True
+
+                if self.log:
+                    self.log.output(data)
+
+                if s_fd == self.stdout_fd:
+                    output.append(data)
+                else:
+                    self.stderr_chunks.append(data)
+
+            if not got_output:
+                break
+
+        # both pipes closed, the program is done or about to be
+        if not self.fds:
+            self.reap()
+
+        return ''.encode('ascii').join(output)
+
+
+    def read_stderr(self):
+        """ Return stderr output collected by read() """
+
+        output = ''.encode('ascii').join(self.stderr_chunks)
+        self.stderr_chunks = []
+
+        return output
+
+
+    def release(self):
+        """ Close all pipes once the process is gone """
+
+        for fd in [self.stdout_fd, self.stderr_fd]:
+            if fd is not None:
+                try:
+                    os.close(fd)
+                except:
+                    pass
+        self.stdout_fd = None
+        self.stderr_fd = None
+        self.fds = []
+
+        return ConqueSubprocess.release(self)
+
+
+    def window_resize(self, lines, columns):
+        """ No window to resize """
+        pass
+
+
+# vim:foldmethod=marker
@@ -0,0 +1,332 @@
+# FILE:     autoload/conque_term/conque_poller.py
+# AUTHOR:   Nico Raffo <nicoraffo@gmail.com>
+# WEBSITE:  http://conque.googlecode.com
+# MODIFIED: __MODIFIED__
+# VERSION:  __VERSION__, for Vim 7.0
+# LICENSE:
+# Conque - Vim terminal/console emulator
+# Copyright (C) 2009-__YEAR__ Nico Raffo
+#
+# MIT License
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in
+# all copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN
+# THE SOFTWARE.
+
+"""
+ConquePoller
+
+Check every running terminal for new output with a single system call.
+
+Reading each terminal separately costs at least one select() timeout per
+terminal, even when none of them have anything to say. The poller keeps a
+registry of terminals and asks the kernel about all of their file descriptors
+at once, without waiting, so only the terminals which are ready need to be
+read and rendered.
+
+The same poll also watches for subprocesses exiting, using a pidfd where the
+system supports it, or the pty hanging up otherwise. Exited processes are
+reaped right away, whether or not their terminal is ever read, and reported
+by exited().
+
+Terminals with queued input are also polled for writability, and their
+input queue is flushed as soon as the pty can take more.
+
+Usage:
+
+    ConqueTerm_Poller.register(1, ConqueTerm_1)
+    ready = ConqueTerm_Poller.poll()
+    done = ConqueTerm_Poller.exited()
+    ConqueTerm_Poller.unregister(1)
+"""
+
+import sys
+import math
+import time
+import select
+
+
+class ConquePoller:
+
+    # terminal instances, keyed by terminal number
+    terminals = None
+
+    # terminal numbers whose exit has already been reported
+    reported = None
+
+    # when the Vim poll timer will next fire, from time.time(), 0 if there is no timer
+    timer_due = 0
+
+    # milliseconds left this tick for background terminals, and how many are still to be read
+    share_left = 0.0
+    share_count = 0
+
+
+    def __init__(self):
+        """ Initialize empty registry """
+
+        self.terminals = {}
+        self.reported = {}
+
+
+    def register(self, idx, term):
+        """ Add a terminal to the registry """
+
+        self.terminals[int(idx)] = term
+
+
+    def unregister(self, idx):
+        """ Remove a terminal from the registry """
+
+        if int(idx) in self.terminals:
+            if self.terminals[int(idx)].read_share:
+                self.terminals[int(idx)].read_share = False
+                self.share_count = max(0, self.share_count - 1)
+            del self.terminals[int(idx)]
+
+        if int(idx) in self.reported:
+            del self.reported[int(idx)]
+
+
+    def poll(self):
+        """ Return the sorted numbers of all terminals with output waiting to be read """
+
+        ready = []
+        fds = {}
+        pidfds = {}
+        write_fds = {}
+
+        for idx in self.terminals.keys():
+            proc = self.terminals[idx].proc
+            fd = getattr(proc, 'fd', None)
+
+            # keep bulk sends flowing
+            if self.terminals[idx].send_buffer is not None:
+                self.terminals[idx].pump_send()
+
+            # output left over from a read which ran out of time
+            if getattr(self.terminals[idx], 'pending_output', None):
+                ready.append(idx)
+
+            # no file descriptor to check, e.g. Windows shared memory
+            if fd is None:
+                ready.append(idx)
+                continue
+
+            # output already drained by a reader thread
+            if getattr(proc, 'reader', None):
+                if proc.reader.pending():
+                    ready.append(idx)
+                elif proc.reader.eof and not proc.exited:
+                    proc.reap()
+
+            # separate output pipes, fd is only used for input
+            elif getattr(proc, 'fds', None) is not None:
+                for read_fd in proc.fds:
+                    fds[read_fd] = idx
+
+                # both pipes closed and nothing else will say when the program exits
+                if not proc.fds and getattr(proc, 'pidfd', None) is None and not proc.exited:
+                    proc.reap()
+
+            else:
+                fds[fd] = idx
+
+            if getattr(proc, 'pidfd', None) is not None:
+                pidfds[proc.pidfd] = idx
+
+            if proc.queued():
+                write_fds[fd] = proc
+
+        if fds or pidfds or write_fds:
+            all_fds = list(fds.keys()) + list(pidfds.keys())
+            try:
+                (readable, writable) = self.poll_fds(all_fds, list(write_fds.keys()))
+
+                for fd in readable:
+                    if fd in pidfds:
+                        self.terminals[pidfds[fd]].proc.reap()
+                    elif fd in fds and fds[fd] not in ready:
+                        ready.append(fds[fd])
+
+                for fd in writable:
+                    write_fds[fd].flush()
+            except:
+                logging.info(traceback.format_exc())
+
+                # fall back to reading everything
+                ready.extend([idx for idx in fds.values() if idx not in ready])
+
+        # let idle terminals back off
+        for idx in self.terminals.keys():
+            if idx not in ready:
+                self.terminals[idx].poll_update(False)
+
+        ready = sorted(set(ready))
+        return ready
+
+
+    def schedule(self, ready, current, budget):
+        """ Order the terminals to be read this tick, and share out the time.
+
+        The current terminal is read first, with its full read budget. The others
+        split budget milliseconds between them, least recently served first, so a
+        busy background terminal can't keep the rest waiting. A budget of 0 lets
+        every terminal use its own read budget.
+
+        """
+        current = int(current)
+        background = [idx for idx in ready if idx != current and idx in self.terminals]
+        background.sort(key=lambda idx: self.terminals[idx].last_parse)
+
+        self.share_left = float(budget)
+        self.share_count = 0
+
+        # shares from the last pass which were never used, e.g. the terminal wasn't read
+        for idx in self.terminals:
+            self.terminals[idx].read_share = False
+
+        if budget > 0:
+            self.share_count = len(background)
+            for idx in background:
+                self.terminals[idx].read_share = True
+
+        if current in ready:
+            return [current] + background
+
+        return background
+
+
+    def take_share(self, budget):
+        """ Milliseconds one background terminal may spend reading, given its own budget """
+
+        if self.share_count <= 0:
+            return budget
+
+        # at least a little progress for everyone
+        share = max(1, int(self.share_left / self.share_count))
+        self.share_count -= 1
+
+        if budget:
+            return min(budget, share)
+
+        return share
+
+
+    def spend(self, elapsed):
+        """ Count milliseconds spent reading against the background budget """
+
+        self.share_left = max(0.0, self.share_left - elapsed)
+
+
+    def next_interval(self, idxs):
+        """ Milliseconds until the first of these terminals is due to be polled """
+
+        now = time.time()
+        interval = None
+
+        for idx in idxs:
+            term = self.terminals.get(int(idx))
+            if term is None:
+                continue
+            wait = max(term.poll_min, int(math.ceil((term.poll_next - now) * 1000)))
+            if interval is None or wait < interval:
+                interval = wait
+
+        if interval is None:
+            self.timer_due = 0
+            return 0
+
+        self.timer_due = now + float(interval) / 1000
+        return interval
+
+
+    def exited(self):
+        """ Return the sorted numbers of terminals whose process exited since the last call """
+
+        done = []
+
+        for idx in self.terminals.keys():
+            if idx in self.reported:
+                continue
+
+            # let the last output be parsed first
+            if getattr(self.terminals[idx].proc, 'exited', False) and not getattr(self.terminals[idx], 'pending_output', None):
+                self.reported[idx] = True
+                done.append(idx)
+
+        done.sort()
+        return done
+
+
+    def reap(self):
+        """ Reap exited subprocesses of terminals which aren't being read """
+
+        pidfds = {}
+
+        for idx in self.terminals.keys():
+            proc = self.terminals[idx].proc
+            if getattr(proc, 'exited', True):
+                continue
+
+            if getattr(proc, 'pidfd', None) is not None:
+                pidfds[proc.pidfd] = proc
+
+            # no exit notification available, fall back to waitpid()
+            else:
+                proc.reap()
+
+        if pidfds:
+            try:
+                for fd in self.poll_fds(list(pidfds.keys()))[0]:
+                    pidfds[fd].reap()
+            except:
+                logging.info(traceback.format_exc())
+
+
+    def poll_fds(self, fds, write_fds=[]):
+        """ Return the lists of readable and writable file descriptors, without blocking """
+
+        # OS X can't poll() terminal devices
+        if hasattr(select, 'poll') and sys.platform != 'darwin':
+            p = select.poll()
+            events = {}
+            for fd in fds:
+                events[fd] = select.POLLIN | select.POLLPRI
+            for fd in write_fds:
+                events[fd] = events.get(fd, 0) | select.POLLOUT
+            for fd in events.keys():
+                p.register(fd, events[fd])
+
+            readable = []
+            writable = []
+            for (fd, event) in p.poll(0):
+                if fd in fds and event & (select.POLLIN | select.POLLPRI | select.POLLHUP | select.POLLERR):
+                    readable.append(fd)
+                if event & select.POLLOUT:
+                    writable.append(fd)
+            return (readable, writable)
+
+        s_read, s_write, s_error = select.select(fds, write_fds, [], 0)
+        return (s_read, s_write)
+
+
+# one poller is shared by all terminals
+ConqueTerm_Poller = ConquePoller()
+
+
+# vim:foldmethod=marker
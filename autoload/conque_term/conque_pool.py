@@ -0,0 +1,169 @@
+# FILE:     autoload/conque_term/conque_pool.py
+# AUTHOR:   Nico Raffo <nicoraffo@gmail.com>
+# WEBSITE:  http://conque.googlecode.com
+# MODIFIED: __MODIFIED__
+# VERSION:  __VERSION__, for Vim 7.0
+# LICENSE:
+# Conque - Vim terminal/console emulator
+# Copyright (C) 2009-__YEAR__ Nico Raffo
+#
+# MIT License
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in
+# all copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN
+# THE SOFTWARE.
+
+"""
+ConquePool
+
+Keep idle, pre-started subprocesses ready for new terminals.
+
+Starting a login shell with heavy rc files can take a second or more before
+the first prompt appears. For commands listed in g:ConqueTerm_PoolCommands,
+the pool starts sessions ahead of time, so conque_term#open() only has to
+resize an already running program and attach it to the new buffer.
+
+Sessions are matched on the command string, $TERM and character encoding,
+and on the working directory and environment Vim had when they were started,
+since a running program can't be moved to another directory. Output a pooled
+session writes before it is attached, such as the prompt, waits in the pty
+until the new terminal reads it. Sessions nobody takes are closed after a
+while, see expire().
+
+Usage:
+
+    ConqueTerm_Pool.fill(['bash --login'], 1, 'vt100', 'utf-8', 24, 80)
+    proc = ConqueTerm_Pool.take('bash --login', 'vt100', 'utf-8')
+    ConqueTerm_Pool.close_all()
+"""
+
+import os
+import time
+
+import vim
+
+
+class ConquePool:
+
+    # [subprocess, start time] of idle sessions, keyed by (command, TERM, encoding, context)
+    sessions = None
+
+    # number of opens served from the pool, and opens which had to start a process
+    hits = 0
+    misses = 0
+
+
+    def __init__(self):
+        """ Initialize empty pool """
+
+        self.sessions = {}
+        self.hits = 0
+        self.misses = 0
+
+
+    def fill(self, commands, size, term, encoding, lines, columns):
+        """ Start sessions until each command has size idle sessions """
+
+        context = self.get_context()
+
+        for command in commands:
+            key = (command, term, encoding, context)
+
+            # sessions started somewhere else won't be used from here
+            for other in list(self.sessions.keys()):
+                if other[:3] == key[:3] and other != key:
+                    self.close_sessions(other)
+
+            idle = [s for s in self.sessions.get(key, []) if s[0].is_alive()]
+
+            while len(idle) < size:
+                proc = ConqueSubprocess()
+                if proc.open(command, {'TERM': term, 'CONQUE': '1', 'LINES': str(lines), 'COLUMNS': str(columns)}, encoding) is False:
+                    break
+                idle.append([proc, time.time()])
+
+            self.sessions[key] = idle
+
+
+    def take(self, command, term, encoding):
+        """ Remove and return an idle session for command, or None if there are none """
+
+        idle = self.sessions.get((command, term, encoding, self.get_context()), [])
+
+        while idle:
+            proc = idle.pop(0)[0]
+
+            # the program may have given up while it was waiting
+            if proc.is_alive():
+                self.hits += 1
+                return proc
+
+        self.misses += 1
+        return None
+
+
+    def expire(self, max_idle):
+        """ Close sessions which have been waiting for more than max_idle seconds """
+
+        oldest = time.time() - max_idle
+
+        for key in list(self.sessions.keys()):
+            for session in self.sessions[key][:]:
+                if session[1] < oldest:
+                    session[0].close()
+                    self.sessions[key].remove(session)
+
+
+    def get_context(self):
+        """ Return what a new program inherits from Vim, the working directory and environment """
+
+        try:
+            env = vim.eval('exists("*environ") ? environ() : {}')
+        except:
+            env = {}
+
+        return (os.getcwd(), hash(tuple(sorted(env.items()))))
+
+
+    def get_stats(self):
+        """ Return the number of idle sessions, hits and misses """
+
+        idle = 0
+        for procs in self.sessions.values():
+            idle += len(procs)
+
+        return {'pool_idle': idle, 'pool_hits': self.hits, 'pool_misses': self.misses}
+
+
+    def close_all(self):
+        """ Terminate all idle sessions """
+
+        for key in list(self.sessions.keys()):
+            self.close_sessions(key)
+
+
+    def close_sessions(self, key):
+        """ Terminate the idle sessions for one key """
+
+        for session in self.sessions.pop(key, []):
+            session[0].close()
+
+
+ConqueTerm_Pool = ConquePool()
+
+
+# vim:foldmethod=marker
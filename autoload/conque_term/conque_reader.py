@@ -0,0 +1,196 @@
+# FILE:     autoload/conque_term/conque_reader.py
+# AUTHOR:   Nico Raffo <nicoraffo@gmail.com>
+# WEBSITE:  http://conque.googlecode.com
+# MODIFIED: __MODIFIED__
+# VERSION:  __VERSION__, for Vim 7.0
+# LICENSE:
+# Conque - Vim terminal/console emulator
+# Copyright (C) 2009-__YEAR__ Nico Raffo
+#
+# MIT License
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in
+# all copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN
+# THE SOFTWARE.
+
+"""
+ConqueReader
+
+Drain a pty file descriptor from a background thread.
+
+Vim only gives Conque a chance to read subprocess output when it fires an
+event, and the kernel pty buffer is only a few KB. Without a reader thread a
+busy program blocks as soon as that buffer is full. The reader copies output
+into a bounded in-memory buffer, which the main thread consumes without
+making any system calls.
+
+When the buffer is full the thread stops reading until the main thread
+catches up. The subprocess is then blocked by the kernel exactly as it would
+be without the thread, so output is never dropped.
+
+Usage:
+
+    r = ConqueReader(fd, 1048576)
+    r.start()
+    output = r.get(timeout = 50)
+    r.stop()
+"""
+
+import os
+import sys
+import errno
+import select
+import threading
+
+
+class ConqueReader:
+
+    # file descriptor to drain
+    fd = None
+
+    # maximum number of bytes to hold before applying backpressure
+    max_size = 1048576
+
+    # pending output chunks and their total length
+    chunks = None
+    size = 0
+
+    # guards chunks and size, signalled whenever either changes
+    cond = None
+
+    # the subprocess closed its end of the pty
+    eof = False
+
+    # background thread
+    thread = None
+    running = False
+
+
+    def __init__(self, fd, max_size=1048576):
+        """ Initialize reader for a file descriptor """
+
+        self.fd = fd
+        self.max_size = max_size
+        self.chunks = []
+        self.size = 0
+        self.cond = threading.Condition()
+        self.eof = False
+
+
+    def start(self):
+        """ Start the background thread """
+
+        self.running = True
+        self.thread = threading.Thread(target=self.run)
+        self.thread.daemon = True
+        self.thread.start()
+
+
+    def run(self):
+        """ Read from fd until EOF or stop() is called """
+
+        while self.running:
+
+            # wait for the main thread to drain a full buffer
+            self.cond.acquire()
+            try:
+                while self.running and self.size >= self.max_size:
+                    self.cond.wait(0.5)
+            finally:
+                self.cond.release()
+
+            # the timeout lets us notice stop() requests
+            try:
+                s_read, s_write, s_error = select.select([self.fd], [], [], 0.5)
+            except:
+                # interrupted by a signal, select.error has no errno attribute in Python 2
+                if sys.exc_info()[1].args[:1] == (errno.EINTR,):
+                    continue
+                break
+
+            if not s_read:
+                continue
+
+            try:
+                data = os.read(self.fd, min(65536, self.max_size - self.size))
+            except OSError:
+                # interrupted by a signal, or the output was gone by the time we read
+                if sys.exc_info()[1].errno in (errno.EINTR, errno.EAGAIN, errno.EWOULDBLOCK):
+                    continue
+
+                # EIO once the program has closed its end of the pty
+                data = None
+
+            self.cond.acquire()
+            try:
+                if not data:
+                    self.eof = True
+                else:
+                    self.chunks.append(data)
+                    self.size += len(data)
+                self.cond.notifyAll()
+            finally:
+                self.cond.release()
+
+            if not data:
+                break
+
+        self.running = False
+
+
+    def get(self, timeout=0):
+        """ Return all buffered output, waiting up to timeout milliseconds for some """
+
+        self.cond.acquire()
+        try:
+            if self.size == 0 and timeout > 0 and not self.eof:
+                self.cond.wait(float(timeout) / 1000)
+
+            if self.size == 0:
+                return None
+
+            data = self.chunks[0][:0].join(self.chunks)
+            self.chunks = []
+            self.size = 0
+
+            # wake the reader if it was waiting on a full buffer
+            self.cond.notifyAll()
+        finally:
+            self.cond.release()
+
+        return data
+
+
+    def pending(self):
+        """ Number of bytes waiting to be consumed """
+
+        return self.size
+
+
+    def stop(self):
+        """ Stop the background thread """
+
+        self.running = False
+
+        self.cond.acquire()
+        try:
+            self.cond.notifyAll()
+        finally:
+            self.cond.release()
+
+
+# vim:foldmethod=marker
@@ -0,0 +1,173 @@
+# FILE:     autoload/conque_term/conque_reaper.py
+# AUTHOR:   Nico Raffo <nicoraffo@gmail.com>
+# WEBSITE:  http://conque.googlecode.com
+# MODIFIED: __MODIFIED__
+# VERSION:  __VERSION__, for Vim 7.0
+# LICENSE:
+# Conque - Vim terminal/console emulator
+# Copyright (C) 2009-__YEAR__ Nico Raffo
+#
+# MIT License
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in
+# all copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN
+# THE SOFTWARE.
+
+"""
+ConqueReaper
+
+Finish off closed terminals in the background.
+
+Closing a terminal hangs up and terminates every process group in its
+session, which includes jobs a shell has started, like make workers or an
+ssh connection. Most programs exit right away, but some ignore SIGTERM or
+take a while to clean up. The reaper watches closed subprocesses from a
+background thread, sends SIGKILL to whatever is still running when the close
+timeout expires, and collects the exit status so no zombies are left behind.
+
+When Vim exits there is no time for a background thread, so finish() waits
+for all closed terminals at once, for no longer than the longest timeout.
+
+Usage:
+
+    proc.close()   # calls ConqueTerm_Reaper.add(proc)
+    ConqueTerm_Reaper.finish()
+"""
+
+import os
+import sys
+import time
+import signal
+import threading
+
+
+class ConqueReaper:
+
+    # closed subprocesses, as [proc, deadline, killed] lists
+    procs = None
+
+    # guards procs
+    lock = None
+
+    # background thread
+    thread = None
+
+    # seconds between checks
+    interval = 0.05
+
+    # seconds to wait for SIGKILL to take effect before giving up
+    kill_wait = 1.0
+
+
+    def __init__(self):
+        """ Initialize empty list of closed subprocesses """
+
+        self.procs = []
+        self.lock = threading.Lock()
+
+
+    def add(self, proc):
+        """ Watch a closed subprocess until its processes are gone """
+
+        deadline = time.time() + float(proc.close_timeout) / 1000
+
+        self.lock.acquire()
+        try:
+            self.procs.append([proc, deadline, False])
+
+            if self.thread is None or not self.thread.is_alive():
+                self.thread = threading.Thread(target=self.run)
+                self.thread.daemon = True
+                self.thread.start()
+        finally:
+            self.lock.release()
+
+
+    def run(self):
+        """ Check closed subprocesses until there are none left """
+
+        while self.check():
+            time.sleep(self.interval)
+
+
+    def check(self, force=False):
+        """ Reap, kill or forget each closed subprocess. Returns True while some are left. """
+
+        self.lock.acquire()
+        try:
+            now = time.time()
+            remaining = []
+
+            for item in self.procs:
+                proc, deadline, killed = item
+                proc.reap()
+                alive = proc.live_process_groups()
+
+                # everything has exited, keep checking until the pty can be closed
+                if proc.exited and not alive:
+                    if proc.release():
+                        continue
+                    remaining.append(item)
+                    continue
+
+                # out of patience
+                if not killed and (force or now >= deadline):
+                    proc.signal_groups(signal.SIGKILL, alive)
+                    item[2] = True
+                    item[1] = now
+
+                # killed and still not gone, probably stuck in the kernel
+                elif killed and now >= item[1] + self.kill_wait:
+                    logging.info('giving up on process ' + str(proc.pid))
+                    proc.release()
+                    continue
+
+                remaining.append(item)
+
+            self.procs = remaining
+            return len(self.procs) > 0
+        finally:
+            self.lock.release()
+
+
+    def finish(self):
+        """ Wait for all closed subprocesses in parallel, then kill what is left """
+
+        deadline = 0
+        self.lock.acquire()
+        try:
+            procs = [item[0] for item in self.procs]
+            for item in self.procs:
+                deadline = max(deadline, item[1])
+        finally:
+            self.lock.release()
+
+        while self.check() and time.time() < deadline:
+            time.sleep(0.01)
+
+        self.check(force=True)
+
+        # let session logs write their last batch
+        for proc in procs:
+            if proc.last_log:
+                proc.last_log.wait(max(0.1, deadline - time.time()))
+
+
+ConqueTerm_Reaper = ConqueReaper()
+
+
+# vim:foldmethod=marker
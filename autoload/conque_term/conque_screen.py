@@ -59,6 +59,9 @@ class ConqueScreen(object):
     # screen and scrolling regions
     screen_top = 1
 
+    # approximate bytes held by the lines above the screen, see get_bytes()
+    scrolled_bytes = 0
+
     # screen width
     screen_width = 80
     screen_height = 80
@@ -66,6 +69,18 @@ class ConqueScreen(object):
     # char encoding for vim buffer
     screen_encoding = 'utf-8'
 
+    # output goes to an in-memory copy while the buffer isn't in any window
+    hidden = False
+
+    # the Vim buffer, while self.buffer is a ConqueShadowBuffer
+    vim_buffer = None
+
+    # windows need scrolling to show the screen, see apply_align()
+    align_pending = False
+
+    # unicode copies of buffer lines, by zero based line number
+    mirror = None
+
 
     def __init__(self):
         """ Initialize screen size and character encoding. """
@@ -80,6 +95,9 @@ class ConqueScreen(object):
         # save screen character encoding type
         self.screen_encoding = vim.eval('&fileencoding')
 
+        self.mirror = {}
+        self.scrolled_bytes = 0
+
 
     def __len__(self):
         """ Define the len() function for ConqueScreen objects. """
@@ -90,12 +108,16 @@ class ConqueScreen(object):
         """ Define value access for ConqueScreen objects. """
         buffer_line = self.get_real_idx(key)
 
+        if buffer_line in self.mirror:
+            return self.mirror[buffer_line]
+
         # if line is past buffer end, add lines to buffer
         if buffer_line >= len(self.buffer):
-            for i in range(len(self.buffer), buffer_line + 1):
-                self.append(' ')
+            self.pad(buffer_line + 1 - len(self.buffer))
 
-        return u(self.buffer[buffer_line], 'utf-8')
+        value = u(self.buffer[buffer_line], 'utf-8')
+        self.mirror[buffer_line] = value
+        return value
 
 
     def __setitem__(self, key, value):
@@ -114,25 +136,116 @@ class ConqueScreen(object):
         else:
             self.buffer[buffer_line] = val
 
+        self.mirror[buffer_line] = value
+
 
     def __delitem__(self, key):
         """ Define value deletion for ConqueScreen objects. """
         del self.buffer[self.screen_top + key - 2]
+        self.mirror = {}
 
 
     def append(self, value):
         """ Define value appending for ConqueScreen objects. """
 
-        if len(self.buffer) > self.screen_top + self.screen_height - 1:
-            self.buffer[len(self.buffer) - 1] = value
+        length = len(self.buffer)
+        if length > self.screen_top + self.screen_height - 1:
+            self.buffer[length - 1] = value
+            self.mirror[length - 1] = u(value)
         else:
             self.buffer.append(value)
+            self.mirror[length] = u(value)
+            length += 1
+
+        if length > self.screen_top + self.screen_height - 1:
+            self.set_top(self.screen_top + 1)
+            self.prune_mirror()
+
+        self.align_pending = True
+
+
+    def pad(self, count):
+        """ Append count blank lines with a single buffer call, as count append() calls would """
+
+        length = len(self.buffer)
+        if length > self.screen_top + self.screen_height - 1:
+            for i in range(count):
+                self.append(' ')
+            return
 
-        if len(self.buffer) > self.screen_top + self.screen_height - 1:
-            self.screen_top += 1
+        self.buffer.append([' '] * count)
+        for i in range(length, length + count):
+            self.mirror[i] = u(' ')
 
-        if vim.current.buffer.number == self.buffer.number:
-            vim.command('normal! G')
+        self.set_top(max(self.screen_top, length + count - self.screen_height + 1))
+        self.prune_mirror()
+        self.align_pending = True
+
+
+    def prune_mirror(self):
+        """ Forget lines which have scrolled off the screen, once there are plenty of them """
+
+        if len(self.mirror) > 4 * self.screen_height:
+            top = self.screen_top - 1
+            for i in [i for i in self.mirror.keys() if i < top]:
+                del self.mirror[i]
+
+
+    def trim(self, count):
+        """ Delete count lines from the top of the buffer, all of them above the screen.
+
+        Returns the deleted lines.
+
+        """
+        if self.hidden:
+            lines = self.buffer.trim(count)
+        else:
+            lines = self.buffer[0:count]
+            del self.buffer[0:count]
+
+        lines = [u(line, self.screen_encoding) for line in lines]
+
+        self.screen_top -= count
+        self.scrolled_bytes -= sum([len(line) + 1 for line in lines])
+        self.align_pending = True
+        self.shift_mirror(-count)
+
+        # the same encoding prepend() uses to put them back
+        return lines
+
+
+    def prepend(self, lines):
+        """ Insert unicode lines above the top of the buffer """
+
+        if CONQUE_PYTHON_VERSION == 2:
+            values = [line.encode(self.screen_encoding) for line in lines]
+        else:
+            values = [str(line) for line in lines]
+
+        self.buffer.append(values, 0)
+
+        self.screen_top += len(lines)
+        self.scrolled_bytes += sum([len(line) + 1 for line in lines])
+        self.shift_mirror(len(lines))
+
+
+    def shift_mirror(self, offset):
+        """ Renumber the mirrored lines after lines were added or removed at the top """
+
+        mirror = {}
+        for i in self.mirror.keys():
+            if i + offset >= 0:
+                mirror[i + offset] = self.mirror[i]
+        self.mirror = mirror
+
+
+    def resync(self):
+        """ Read lines from the buffer again, after it may have been changed outside of Conque """
+        self.mirror = {}
+
+        self.scrolled_bytes = 0
+        for i in range(0, self.screen_top - 1):
+            self.scrolled_bytes += self.line_bytes(i)
 
 
     def insert(self, line, value):
@@ -143,6 +256,43 @@ class ConqueScreen(object):
             self.buffer.append(value, l)
         except:
             self.buffer[l:l] = [value]
+        self.mirror = {}
+
+
+    def get_bytes(self):
+        """ Approximate memory held by the buffer lines.
+
+        Lines above the screen don't change, so they're counted as they scroll off
+        the top. Only the lines of the screen itself are measured here.
+
+        """
+        total = self.scrolled_bytes
+        for i in range(self.screen_top - 1, len(self.buffer)):
+            total += self.line_bytes(i)
+
+        return total
+
+
+    def line_bytes(self, idx):
+        """ Approximate memory held by a buffer line, from zero based index idx """
+
+        if idx in self.mirror:
+            return len(self.mirror[idx]) + 1
+
+        return len(self.buffer[idx]) + 1
+
+
+    def set_top(self, top):
+        """ Move the top of the screen, keeping count of the lines above it """
+
+        if top > self.screen_top:
+            for i in range(self.screen_top - 1, min(top - 1, len(self.buffer))):
+                self.scrolled_bytes += self.line_bytes(i)
+        else:
+            for i in range(top - 1, self.screen_top - 1):
+                self.scrolled_bytes -= self.line_bytes(i)
+
+        self.screen_top = top
 
 
     def get_top(self):
@@ -168,37 +318,50 @@ class ConqueScreen(object):
     def clear(self):
         """ Clear the screen. Does not clear the buffer, just scrolls down past all text. """
 
-        self.screen_width = width
         self.buffer.append(' ')
-        vim.command('normal! Gzt')
-        self.screen_top = len(self.buffer)
+        self.set_top(len(self.buffer))
+        self.mirror[self.screen_top - 1] = u(' ')
+        self.prune_mirror()
+        self.align_pending = True
 
 
     def set_cursor(self, line, column):
-        """ Set cursor position. """
+        """ Set cursor position.
+
+        The screen column is a character count, while Vim wants a byte offset
+        into the line, so the offset is worked out here from the line text.
+        Nothing is done if the cursor is already in place.
+
+        """
+        # the cursor belongs to another buffer
+        if not self.is_current():
+            return
+
+        # scroll first, so the cursor doesn't drag the view along
+        self.apply_align()
 
         # figure out line
         buffer_line = self.screen_top + line - 1
         if buffer_line > len(self.buffer):
-            for l in range(len(self.buffer) - 1, buffer_line):
-                self.buffer.append('')
+            self.buffer.append([''] * (buffer_line - len(self.buffer) + 1))
 
         # figure out column
         real_column = column
-        if len(self.buffer[buffer_line - 1]) < real_column:
-            self.buffer[buffer_line - 1] = self.buffer[buffer_line - 1] + ' ' * (real_column - len(self.buffer[buffer_line - 1]))
+        text = self[line]
+        if len(text) < real_column:
+            text = text + ' ' * (real_column - len(text))
+            self[line] = text
 
-        if not CONQUE_FAST_MODE:
-            # set cursor at byte index of real_column'th character
-            vim.command('call cursor(' + str(buffer_line) + ', byteidx(getline(' + str(buffer_line) + '), ' + str(real_column) + '))')
+        # byte offset of the real_column'th character
+        byte_column = len(text[:real_column - 1].encode(CONQUE_VIM_ENCODING, 'replace'))
 
-        else:
-            # old version
-            # python version is occasionally grumpy
-            try:
-                vim.current.window.cursor = (buffer_line, real_column - 1)
-            except:
-                vim.command('call cursor(' + str(buffer_line) + ', ' + str(real_column) + ')')
+        # python version is occasionally grumpy
+        try:
+            window = vim.current.window
+            if tuple(window.cursor) != (buffer_line, byte_column):
+                window.cursor = (buffer_line, byte_column)
+        except:
+            vim.command('call cursor(' + str(buffer_line) + ', ' + str(byte_column + 1) + ')')
 
 
     def reset_size(self, line):
@@ -214,13 +377,11 @@ class ConqueScreen(object):
         # reset screen size
         self.screen_width = vim.current.window.width
         self.screen_height = vim.current.window.height
-        self.screen_top = len(self.buffer) - vim.current.window.height + 1
-        if self.screen_top < 1:
-            self.screen_top = 1
+        self.set_top(max(1, len(self.buffer) - vim.current.window.height + 1))
         logging.debug('new screen top is  ' + str(self.screen_top))
 
         # align bottom of buffer to bottom of screen
-        vim.command('normal! ' + str(self.screen_height) + 'kG')
+        self.align_pending = True
 
         # return new relative line number
         return (buffer_line - self.screen_top)
@@ -228,6 +389,157 @@ class ConqueScreen(object):
 
     def align(self):
         """ align bottom of buffer to bottom of screen """
-        vim.command('normal! ' + str(self.screen_height) + 'kG')
+        self.align_pending = True
+
+
+    def apply_align(self):
+        """ Scroll the windows showing the terminal, once after any number of align() calls.
+
+        The current window gets the top of the screen as its first line. Other windows
+        showing the buffer follow the output by moving their cursor to the last line.
+
+        """
+        if not self.align_pending or self.hidden:
+            return
+
+        self.align_pending = False
+
+        try:
+            for window in vim.windows:
+                if window.buffer.number != self.buffer.number or window == vim.current.window:
+                    continue
+                window.cursor = (len(self.buffer), 0)
+        except:
+            pass
+
+        if not self.is_current():
+            return
+
+        # partial winrestview() dictionaries need Vim 7.4
+        if CONQUE_VIM_VERSION >= 704:
+            vim.command('call winrestview({"topline": ' + str(self.screen_top) + '})')
+        else:
+            vim.command('normal! ' + str(self.screen_top) + 'Gzt')
+
+
+    def is_current(self):
+        """ Check if this is the current Vim buffer """
+        return vim.current.buffer.number == self.buffer.number
+
+
+    def hide(self):
+        """ Keep further output in memory, the buffer is no longer in any window """
+
+        if self.hidden:
+            return
+
+        self.vim_buffer = self.buffer
+        self.buffer = ConqueShadowBuffer(self.vim_buffer, self.screen_top - 1)
+        self.hidden = True
+
+
+    def show(self):
+        """ Copy output received while hidden to the Vim buffer, in one go """
+
+        if not self.hidden:
+            return
+
+        self.buffer.sync()
+        self.buffer = self.vim_buffer
+        self.vim_buffer = None
+        self.hidden = False
+
+
+
+class ConqueShadowBuffer(object):
+    """ In-memory stand-in for a hidden terminal's Vim buffer.
+
+    Only the lines from the top of the screen down are copied, since that is
+    all terminal output can change. Lines scrolled past while hidden pile up
+    at the end, and sync() writes them all back with a single slice assignment.
+    Lines above the copy are read and written in the Vim buffer directly.
+
+    """
+
+    def __init__(self, buffer, start):
+        """ Copy the lines of buffer from zero based index start """
+
+        self.buffer = buffer
+        self.number = buffer.number
+        self.start = max(0, start)
+        self.lines = list(buffer[self.start:])
+
+
+    def __len__(self):
+        return self.start + len(self.lines)
+
+
+    def __getitem__(self, idx):
+        if idx < 0:
+            idx += len(self)
+        if idx < self.start:
+            return self.buffer[idx]
+        return self.lines[idx - self.start]
+
+
+    def __setitem__(self, idx, value):
+        if idx < 0:
+            idx += len(self)
+        if idx < self.start:
+            self.buffer[idx] = value
+        else:
+            self.lines[idx - self.start] = value
+
+
+    def __delitem__(self, idx):
+        if idx < 0:
+            idx += len(self)
+        if idx < self.start:
+            del self.buffer[idx]
+            self.start -= 1
+        else:
+            del self.lines[idx - self.start]
+
+
+    def append(self, value, idx=None):
+        """ Same as Vim's buffer.append(), insert value before line idx or at the end """
+
+        if isinstance(value, list):
+            values = value
+        else:
+            values = [value]
+
+        if idx is None:
+            self.lines.extend(values)
+        elif idx < self.start:
+            self.buffer.append(values, idx)
+            self.start += len(values)
+        else:
+            self.lines[idx - self.start:idx - self.start] = values
+
+
+    def trim(self, count):
+        """ Delete count lines from the top, from the Vim buffer and then the copy. Returns them. """
+
+        lines = []
+
+        in_buffer = min(count, self.start)
+        if in_buffer:
+            lines = list(self.buffer[0:in_buffer])
+            del self.buffer[0:in_buffer]
+            self.start -= in_buffer
+
+        # the Vim buffer still has these, sync() overwrites them
+        if count > in_buffer:
+            lines.extend(self.lines[:count - in_buffer])
+            del self.lines[:count - in_buffer]
+
+        return lines
+
+
+    def sync(self):
+        """ Write the copied lines back to the Vim buffer """
+
+        self.buffer[self.start:] = self.lines
 
 
@@ -57,6 +57,11 @@ class ConqueSole(Conque):
     # line offset, shifts output down
     offset = 0
 
+    # the console is read as a whole screen, so poll at a fixed rate
+    poll_min = 50
+    poll_max = 50
+    poll_interval = 50
+
 
     def open(self):
         """ Start command and initialize this instance
@@ -82,6 +87,7 @@ class ConqueSole(Conque):
 
         # color mode
         self.color_mode = vim.eval('g:ConqueTerm_ColorMode')
+        self.color_history = {}
 
         # line offset
         self.offset = int(options['offset'])
@@ -391,6 +397,33 @@ class ConqueSole(Conque):
             self.proc.window_resize(vim.current.window.height, vim.current.window.width)
 
 
+    def has_exited(self):
+        """ Check console status, but not every time since it's expensive """
+
+        return self.read_count % 32 == 0 and not self.proc.is_alive()
+
+
+    def get_exit_status(self):
+        """ Exit status isn't available from the console controller """
+
+        return None
+
+
+    def set_encoding(self, encoding):
+        """ Windows consoles use g:ConqueTerm_CodePage instead """
+        pass
+
+
+    def start_log(self, path, log_input=False, compress=False):
+        """ Raw console output isn't available, only the rendered screen """
+        return False
+
+
+    def stop_log(self):
+        """ No session log on Windows """
+        pass
+
+
     def set_cursor(self, line, column):
         """ Update cursor position in Vim buffer """
 
@@ -440,6 +473,16 @@ class ConqueSole(Conque):
         self.proc.resume()
 
 
+    def hide(self):
+        """ The console keeps its own screen, nothing to do """
+        pass
+
+
+    def show(self):
+        """ The next read redraws the screen """
+        pass
+
+
     def close(self):
         """ end console subprocess """
         self.proc.close()
@@ -203,6 +203,21 @@ class ConqueSoleWrapper():
             self.bucket = self.bucket[500:]
 
 
+    def flush(self):
+        """ Write queued input to shared memory, if there is room. """
+
+        if self.bucket:
+            self.write(u(''))
+
+        return len(self.bucket)
+
+
+    def queued(self):
+        """ Length of input waiting to be written. """
+
+        return len(self.bucket)
+
+
     def write_vk(self, vk_code):
         """ Write virtual key code to shared memory using proprietary escape sequences. """
 
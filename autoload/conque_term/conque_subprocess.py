@@ -44,6 +44,8 @@ Usage:
 """
 
 import os
+import sys
+import errno
 import signal
 import pty
 import tty
@@ -52,6 +54,8 @@ import fcntl
 import termios
 import struct
 import shlex
+import codecs
+import threading
 
 
 class ConqueSubprocess:
@@ -62,10 +66,65 @@ class ConqueSubprocess:
     # stdout+stderr file descriptor
     fd = None
 
+    # character encoding used by the subprocess
+    encoding = 'utf-8'
 
-    def open(self, command, env={}):
+    # incremental codecs, so multi-byte characters may be split between reads
+    decoder = None
+    encoder = None
+
+    # True if the encoding maps ASCII to itself, enabling the ASCII fast path
+    ascii_safe = True
+
+    # True if the decoder is holding part of a multi-byte character
+    decode_pending = False
+
+    # optional background thread draining the pty
+    reader = None
+
+    # process exit notification, where supported (Linux 5.3+, Python 3.9+)
+    pidfd = None
+
+    # set once the process has been reaped
+    exited = False
+
+    # exit code, or negative signal number. None if unknown
+    exit_status = None
+
+    # reap() is called from the reaper thread as well as the main thread
+    reap_lock = None
+
+    # encoded input waiting to be written, and its total length
+    input_queue = None
+    input_size = 0
+
+    # input statistics
+    bytes_written = 0
+    write_calls = 0
+    partial_writes = 0
+    max_queued = 0
+
+    # milliseconds to wait after close() before sending SIGKILL
+    close_timeout = 500
+
+    # process groups signalled by close()
+    groups = None
+
+    # optional session log
+    log = None
+
+    # the log writer stopped last, which may still be writing its last batch
+    last_log = None
+
+
+    def open(self, command, env={}, encoding='utf-8'):
         """ Create subprocess using forkpty() """
 
+        # init character encoding
+        self.set_encoding(encoding)
+
+        self.reap_lock = threading.Lock()
+
         # parse command
         command_arr = shlex.split(command)
         executable = command_arr[0]
@@ -103,14 +162,37 @@ class ConqueSubprocess:
             # replace this process with the subprocess
             os.execvp(executable, args)
 
-        # else master, do nothing
+        # else master, ask to be notified when the process exits
         else:
-            pass
+            try:
+                self.pidfd = os.pidfd_open(self.pid)
+            except:
+                self.pidfd = None
+
+            # input is queued rather than blocking Vim when the pty is full
+            self.input_queue = []
+            fcntl.fcntl(self.fd, fcntl.F_SETFL, fcntl.fcntl(self.fd, fcntl.F_GETFL) | os.O_NONBLOCK)
+
+
+    def start_reader(self, max_size=1048576):
+        """ Drain the pty from a background thread into a bounded buffer """
+
+        self.reader = ConqueReader(self.fd, max_size)
+        self.reader.start()
 
 
     def read(self, timeout=1):
         """ Read from subprocess and return new output """
 
+        # output already drained by the reader thread, no syscalls needed
+        if self.reader:
+            data = self.reader.get(timeout)
+            if not data and self.reader.eof:
+                self.reap()
+            if data and self.log:
+                self.log.output(data)
+            return self.decode(data)
+
         output = ''
         read_timeout = float(timeout) / 1000
         read_ct = 0
@@ -118,10 +200,18 @@ class ConqueSubprocess:
         try:
             # read from fd until no more output
             while 1:
-                s_read, s_write, s_error = select.select([self.fd], [], [], read_timeout)
+                # watch for process exit in the same call
+                if self.pidfd is not None:
+                    s_read, s_write, s_error = select.select([self.fd, self.pidfd], [], [], read_timeout)
+                else:
+                    s_read, s_write, s_error = select.select([self.fd], [], [], read_timeout)
 
                 lines = ''
                 for s_fd in s_read:
+                    if s_fd == self.pidfd:
+                        self.reap()
+                        continue
+
                     try:
                         # increase read buffer so huge reads don't slow down
                         if read_ct < 10:
@@ -131,12 +221,20 @@ class ConqueSubprocess:
                         else:
                             lines = os.read(self.fd, 2048)
                         read_ct += 1
+                    except OSError:
+                        # EIO, the other end of the pty has been closed
+                        self.reap()
                     except:
                         pass
-                    output = output + lines.decode('utf-8')
+                    if lines and self.log:
+                        self.log.output(lines)
+                    output = output + self.decode(lines)
 
-                if lines == '' or read_ct > 100:
+                if not lines or read_ct > 100:
                     break
+
+                # only wait for the first output, then take what's there
+                read_timeout = min(read_timeout, 0.001)
         except:
             logging.info(traceback.format_exc())
             pass
@@ -144,22 +242,148 @@ class ConqueSubprocess:
         return output
 
 
+    def echo_mode(self):
+        """ Return whether the pty is in canonical mode and echoes input, None if unknown """
+
+        try:
+            attrs = termios.tcgetattr(self.fd)
+            return (bool(attrs[3] & termios.ICANON), bool(attrs[3] & termios.ECHO))
+        except:
+            return None
+
+
     def write(self, input):
         """ Write new input to subprocess """
 
         try:
-            if CONQUE_PYTHON_VERSION == 2:
-                os.write(self.fd, input.encode('utf-8', 'ignore'))
-            else:
-                os.write(self.fd, bytes(input, 'utf-8'))
+            data = self.encode(input)
         except:
             logging.info(traceback.format_exc())
-            pass
+            return
+
+        if data:
+            self.input_queue.append(data)
+            self.input_size += len(data)
+            self.max_queued = max(self.max_queued, self.input_size)
+
+        self.flush()
+
+
+    def flush(self):
+        """ Write all queued input with a single call. Anything the pty won't take stays queued. """
+
+        if not self.input_size:
+            return 0
+
+        data = self.input_queue[0][:0].join(self.input_queue)
+
+        try:
+            written = os.write(self.fd, data)
+            self.write_calls += 1
+        except:
+            # pty is full, try again when it's writable
+            if getattr(sys.exc_info()[1], 'errno', None) in (errno.EAGAIN, errno.EWOULDBLOCK, errno.EINTR):
+                written = 0
+            # otherwise the subprocess is gone or the pty closed, drop the input
+            else:
+                logging.info(traceback.format_exc())
+                written = len(data)
+
+        self.bytes_written += written
+
+        if written and self.log:
+            self.log.input(data[:written])
+
+        if written < len(data):
+            if written:
+                self.partial_writes += 1
+            self.input_queue = [data[written:]]
+            self.input_size = len(data) - written
+        else:
+            self.input_queue = []
+            self.input_size = 0
+
+        return self.input_size
+
+
+    def queued(self):
+        """ Number of input bytes waiting to be written """
+
+        return self.input_size
+
+
+    def get_input_stats(self):
+        """ Input queue statistics """
+
+        return {'queued_bytes': self.input_size, 'max_queued_bytes': self.max_queued, 'bytes_written': self.bytes_written, 'write_calls': self.write_calls, 'partial_writes': self.partial_writes}
+
+
+    def set_encoding(self, encoding):
+        """ Set the character encoding used to talk to the subprocess """
+
+        try:
+            codecs.lookup(encoding)
+        except LookupError:
+            logging.info('unknown encoding ' + str(encoding) + ', using utf-8')
+            encoding = 'utf-8'
+
+        self.encoding = encoding
+        self.decoder = codecs.getincrementaldecoder(encoding)('replace')
+        self.decode_pending = False
+        self.encoder = codecs.getincrementalencoder(encoding)('replace')
+
+        # stateful encodings such as utf-16 or iso-2022-jp can't take the ASCII shortcut.
+        # iso-2022 output is all 7-bit, so only trust codecs known to have no shift state
+        self.ascii_safe = False
+        if codecs.lookup(encoding).name.startswith(CONQUE_STATELESS_CODECS):
+            ascii_chars = u('').join([uchr(i) for i in range(128)])
+            try:
+                self.ascii_safe = ascii_chars.encode(encoding) == ascii_chars.encode('ascii')
+            except:
+                pass
+
+
+    def decode(self, data):
+        """ Decode raw subprocess output into a unicode string """
+
+        if not data:
+            return u('')
+
+        # pure ASCII output doesn't need to go through the codec
+        if self.ascii_safe and not self.decode_pending:
+            try:
+                return data.decode('ascii')
+            except UnicodeDecodeError:
+                pass
+
+        output = self.decoder.decode(data)
+        self.decode_pending = len(self.decoder.getstate()[0]) > 0
+
+        return output
+
+
+    def encode(self, input):
+        """ Encode a unicode string for the subprocess """
+
+        if CONQUE_PYTHON_VERSION == 2 and not isinstance(input, unicode):
+            input = unicode(input, 'utf-8', 'replace')
+
+        if self.ascii_safe:
+            try:
+                return input.encode('ascii')
+            except UnicodeEncodeError:
+                pass
+
+        return self.encoder.encode(input)
 
 
     def signal(self, signum):
         """ signal process """
 
+        # the pid may belong to somebody else by now
+        if self.exited:
+            return
+
         try:
             os.kill(self.pid, signum)
         except:
@@ -167,22 +391,191 @@ class ConqueSubprocess:
 
 
     def close(self):
-        """ close process with sigterm signal """
+        """ Hang up and terminate every process group in the session, without waiting.
+
+        The reaper sends SIGKILL to anything still running once close_timeout has
+        passed. Interactive shells ignore SIGTERM but exit on SIGHUP, passing it
+        on to their jobs.
+
+        """
+        self.groups = self.get_process_groups()
+        self.signal_groups(signal.SIGHUP, self.groups)
+        self.signal_groups(signal.SIGTERM, self.groups)
+
+        if self.reader:
+            self.reader.stop()
+
+        self.stop_log()
+
+        ConqueTerm_Reaper.add(self)
+
+
+    def start_log(self, path, log_input=False, compress=False):
+        """ Tee raw pty data to a log file. Returns False if the file can't be opened. """
+
+        self.stop_log()
+
+        log = ConqueLogWriter(path, log_input, compress)
+        if not log.start():
+            return False
+
+        self.log = log
+        return True
 
-        self.signal(15)
+
+    def stop_log(self):
+        """ Stop logging, after the log writer has caught up """
+
+        if self.log:
+            self.log.stop()
+            self.last_log = self.log
+            self.log = None
+
+
+    def get_process_groups(self):
+        """ Find the process groups in this terminal's session.
+
+        pty.fork() makes the child a session and group leader, so its pid is
+        also a process group id. Shells with job control move each job to a
+        group of its own, found with tcgetpgrp() for the foreground job and
+        /proc for background jobs, where available.
+
+        Once the child has been reaped its pid may belong to somebody else, so
+        its group is only signalled if /proc shows members left in the session.
+
+        """
+        groups = []
+        if not self.exited:
+            groups.append(self.pid)
+
+        try:
+            pgid = os.tcgetpgrp(self.fd)
+            if pgid > 0 and pgid not in groups:
+                groups.append(pgid)
+        except:
+            pass
+
+        if os.path.isdir('/proc'):
+            for entry in os.listdir('/proc'):
+                if not entry.isdigit():
+                    continue
+                try:
+                    f = open('/proc/' + entry + '/stat')
+                    try:
+                        stat = f.read()
+                    finally:
+                        f.close()
+                    # pid (comm) state ppid pgrp session ...
+                    fields = stat[stat.rindex(')') + 2:].split()
+                    if int(fields[3]) == self.pid and int(fields[2]) not in groups:
+                        groups.append(int(fields[2]))
+                except:
+                    pass
+
+        return groups
+
+
+    def live_process_groups(self):
+        """ Return the process groups signalled by close() which still have members """
+
+        groups = self.groups
+        if groups is None:
+            groups = self.get_process_groups()
+
+        alive = []
+        for pgid in groups:
+            try:
+                os.killpg(pgid, 0)
+                alive.append(pgid)
+            except:
+                pass
+
+        return alive
+
+
+    def signal_groups(self, signum, groups):
+        """ Send a signal to each process group """
+
+        for pgid in groups:
+            try:
+                os.killpg(pgid, signum)
+            except:
+                pass
+
+
+    def release(self):
+        """ Close the pty once the process is gone. Returns False if it is still in use. """
+
+        # the reader thread may still be using the fd
+        if self.reader and self.reader.running:
+            return False
+
+        if self.fd is not None:
+            try:
+                os.close(self.fd)
+            except:
+                pass
+            self.fd = None
+
+        return True
 
 
     def is_alive(self):
         """ get process status """
 
-        p_status = True
+        return not self.reap()
+
+
+    def reap(self):
+        """ Collect the exit status if the process has exited, without blocking.
+
+        Returns True once the process has been reaped. The exit status is kept, so
+        only the first caller to see the process exit waits for it.
+
+        """
+        if self.exited:
+            return True
+
+        self.reap_lock.acquire()
         try:
-            if os.waitpid(self.pid, os.WNOHANG)[0]:
-                p_status = False
-        except:
-            p_status = False
+            if self.exited:
+                return True
 
-        return p_status
+            try:
+                pid, status = os.waitpid(self.pid, os.WNOHANG)
+            except OSError:
+                # reaped outside of Conque, the exit status is lost
+                if sys.exc_info()[1].errno == errno.ECHILD:
+                    self.set_exited(None)
+                    return True
+                return False
+
+            if not pid:
+                return False
+
+            if os.WIFSIGNALED(status):
+                self.set_exited(-os.WTERMSIG(status))
+            else:
+                self.set_exited(os.WEXITSTATUS(status))
+
+            return True
+        finally:
+            self.reap_lock.release()
+
+
+    def set_exited(self, exit_status):
+        """ Record process exit """
+
+        # status first, reap() returns as soon as exited is set
+        self.exit_status = exit_status
+        self.exited = True
+
+        if self.pidfd is not None:
+            try:
+                os.close(self.pidfd)
+            except:
+                pass
+            self.pidfd = None
 
 
     def window_resize(self, lines, columns):
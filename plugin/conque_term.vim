@@ -113,6 +113,12 @@ if !exists('g:ConqueTerm_TERM')
     let g:ConqueTerm_TERM =  'vt100'
 endif " }}}
 
+" Character encoding used by terminal programs, Unix ONLY {{{
+" Output is decoded with this encoding and invalid bytes are replaced
+if !exists('g:ConqueTerm_Encoding')
+    let g:ConqueTerm_Encoding = 'utf-8'
+endif " }}}
+
 " Syntax for your buffer {{{
 if !exists('g:ConqueTerm_Syntax')
     let g:ConqueTerm_Syntax = 'conque_term'
@@ -123,6 +129,100 @@ if !exists('g:ConqueTerm_ReadUnfocused')
     let g:ConqueTerm_ReadUnfocused = 0
 endif " }}}
 
+" Drain terminal output from a background thread, Unix ONLY {{{
+" Programs keep running at full speed while the buffer is unfocused
+if !exists('g:ConqueTerm_ReadThread')
+    let g:ConqueTerm_ReadThread = 0
+endif " }}}
+
+" Maximum bytes of output the reader thread holds before pausing the program {{{
+if !exists('g:ConqueTerm_ReadBufferSize')
+    let g:ConqueTerm_ReadBufferSize = 1048576
+endif " }}}
+
+" Milliseconds to let a closed terminal's processes exit before killing them {{{
+if !exists('g:ConqueTerm_CloseTimeout')
+    let g:ConqueTerm_CloseTimeout = 500
+endif " }}}
+
+" Write a transcript of each terminal session to this file {{{
+if !exists('g:ConqueTerm_LogFile')
+    let g:ConqueTerm_LogFile = ''
+endif " }}}
+
+" Include input in session transcripts {{{
+if !exists('g:ConqueTerm_LogInput')
+    let g:ConqueTerm_LogInput = 0
+endif " }}}
+
+" Gzip compress session transcripts {{{
+if !exists('g:ConqueTerm_LogCompress')
+    let g:ConqueTerm_LogCompress = 0
+endif " }}}
+
+" Fastest and slowest terminal poll rate, in milliseconds {{{
+if !exists('g:ConqueTerm_PollMinInterval')
+    let g:ConqueTerm_PollMinInterval = 5
+endif
+if !exists('g:ConqueTerm_PollMaxInterval')
+    let g:ConqueTerm_PollMaxInterval = 1000
+endif " }}}
+
+" Milliseconds of output parsing per read, 0 for no limit {{{
+if !exists('g:ConqueTerm_ReadBudget')
+    let g:ConqueTerm_ReadBudget = 8
+endif " }}}
+
+" Longest wait in milliseconds for typed input to be echoed, 0 to not wait {{{
+if !exists('g:ConqueTerm_EchoWait')
+    let g:ConqueTerm_EchoWait = 0
+endif " }}}
+
+" Draw typed characters before the program echoes them {{{
+if !exists('g:ConqueTerm_PredictEcho')
+    let g:ConqueTerm_PredictEcho = 0
+endif " }}}
+
+" Lines to keep above the terminal screen, 0 for no limit {{{
+if !exists('g:ConqueTerm_Scrollback')
+    let g:ConqueTerm_Scrollback = 10000
+endif " }}}
+
+" Keep lines trimmed from the scrollback in a compressed file, see :ConqueTermHistory {{{
+if !exists('g:ConqueTerm_History')
+    let g:ConqueTerm_History = 1
+endif " }}}
+
+" Megabytes of memory each terminal may hold in lines and colors, 0 for no limit {{{
+if !exists('g:ConqueTerm_MemoryLimit')
+    let g:ConqueTerm_MemoryLimit = 64
+endif " }}}
+
+" Milliseconds to wait for window sizes to settle before resizing terminals {{{
+if !exists('g:ConqueTerm_ResizeDelay')
+    let g:ConqueTerm_ResizeDelay = 100
+endif " }}}
+
+" Milliseconds per read shared by terminals in the background, 0 for no limit {{{
+if !exists('g:ConqueTerm_BackgroundBudget')
+    let g:ConqueTerm_BackgroundBudget = 8
+endif " }}}
+
+" Commands to keep pre-started, idle sessions of {{{
+if !exists('g:ConqueTerm_PoolCommands')
+    let g:ConqueTerm_PoolCommands = []
+endif " }}}
+
+" Number of idle sessions to keep for each pooled command {{{
+if !exists('g:ConqueTerm_PoolSize')
+    let g:ConqueTerm_PoolSize = 1
+endif " }}}
+
+" Seconds an unused pooled session is kept before it's closed, 0 to keep them {{{
+if !exists('g:ConqueTerm_PoolIdle')
+    let g:ConqueTerm_PoolIdle = 600
+endif " }}}
+
 " Use this regular expression to highlight prompt {{{
 if !exists('g:ConqueTerm_PromptRegex')
     let g:ConqueTerm_PromptRegex = '^\w\+@[0-9A-Za-z_.-]\+:[0-9A-Za-z_./\~,:-]\+\$'
@@ -194,6 +294,8 @@ command! -nargs=+ -complete=shellcmd ConqueTerm call conque_term#open(<q-args>)
 command! -nargs=+ -complete=shellcmd ConqueTermSplit call conque_term#open(<q-args>, ['belowright split'])
 command! -nargs=+ -complete=shellcmd ConqueTermVSplit call conque_term#open(<q-args>, ['belowright vsplit'])
 command! -nargs=+ -complete=shellcmd ConqueTermTab call conque_term#open(<q-args>, ['tabnew'])
+command! -nargs=0 ConqueTermCancelSend call conque_term#get_instance().cancel_send()
+command! -nargs=? ConqueTermHistory call conque_term#get_instance().load_history(<q-args>)
 
 " }}}
 
@@ -207,6 +309,13 @@ if exists('g:ConqueTerm_SessionSupport') && g:ConqueTerm_SessionSupport == 1
     autocmd SessionLoadPost * call conque_term#resume_session()
 endif
 
+" start pooled sessions once Vim has finished starting up
+if !empty(g:ConqueTerm_PoolCommands)
+    augroup ConqueTermPool
+    autocmd CursorHold,CursorHoldI * call conque_term#pool_fill()
+    augroup END
+endif
+
 if maparg(g:ConqueTerm_ExecFileKey, 'n') == ''
     exe 'nnoremap <silent> ' . g:ConqueTerm_ExecFileKey . ' :call conque_term#exec_file()<CR>'
 endif
@@ -0,0 +1,51 @@
+
+import time
+
+import vim
+
+# run with :pyfile tests/pool_benchmark.py from a Conque terminal buffer.
+# the namespace is shared with Conque, so keep the time module name intact
+
+def conque_pool_benchmark(command, runs):
+
+    env = {'TERM': 'vt100', 'CONQUE': '1', 'LINES': '24', 'COLUMNS': '80'}
+
+    # start the program when the terminal is opened
+    cold = []
+    for i in range(0, runs):
+        start = time.time()
+        proc = ConqueSubprocess()
+        proc.open(command, env)
+        conque_pool_wait_output(proc)
+        cold.append(time.time() - start)
+        proc.close()
+
+    # take a session which was started while Vim was idle
+    pool = ConquePool()
+    warm = []
+    for i in range(0, runs):
+        pool.fill([command], 1, 'vt100', 'utf-8', 24, 80)
+        time.sleep(3)
+        start = time.time()
+        proc = pool.take(command, 'vt100', 'utf-8')
+        proc.window_resize(24, 80)
+        conque_pool_wait_output(proc)
+        warm.append(time.time() - start)
+        proc.close()
+
+    pool.close_all()
+
+    print('open to first output, %d runs of %s' % (runs, command))
+    print('  without pool: %.1f ms' % (sum(cold) / runs * 1000))
+    print('  with pool:    %.1f ms' % (sum(warm) / runs * 1000))
+
+
+
+def conque_pool_wait_output(proc):
+
+    while proc.read(10) == '':
+        pass
+
+
+conque_pool_benchmark(vim.eval('&shell') + ' --login', 5)
+    